@@ -0,0 +1,158 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+import gestures
+from engine import MediaPipeDetector
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+CLASSES = list(gestures.GESTURES) + ["none"]
+IMAGE_CHUNK = 64
+
+# Per-process state; each pool worker builds its own MediaPipe graphs
+_worker = {}
+
+def _init_worker(detect_scale):
+    _worker["detect_scale"] = detect_scale
+
+def _get_detector(static_image_mode):
+    # Same detector backend the game uses
+    key = "static" if static_image_mode else "video"
+    if key not in _worker:
+        _worker[key] = MediaPipeDetector(static_image_mode=static_image_mode,
+                                         detect_scale=_worker["detect_scale"])
+    return _worker[key]
+
+def _eval_video(path):
+    detector = _get_detector(False)
+    detector.reset()
+    source = os.path.basename(path)
+    predictions = []
+
+    capture = cv2.VideoCapture(path)
+    index = 0
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        predictions.append((source, str(index), detector.detect(frame).gesture))
+        index += 1
+    capture.release()
+    return predictions
+
+def _eval_images(source, paths):
+    detector = _get_detector(True)
+    predictions = []
+    for path in paths:
+        frame = cv2.imread(path)
+        detector.reset()
+        prediction = detector.detect(frame).gesture if frame is not None else None
+        predictions.append((source, os.path.basename(path), prediction))
+    return predictions
+
+def _run_task(task):
+    kind, args = task
+    if kind == "video":
+        return _eval_video(*args)
+    return _eval_images(*args)
+
+def build_tasks(sources):
+    # Videos are one task each (tracking needs frame order); image
+    # directories are split into independent chunks
+    tasks = []
+    for source in sources:
+        if os.path.isdir(source):
+            images = sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+            )
+            name = os.path.basename(os.path.normpath(source))
+            for i in range(0, len(images), IMAGE_CHUNK):
+                tasks.append(("images", (name, images[i:i + IMAGE_CHUNK])))
+        else:
+            tasks.append(("video", (source,)))
+    return tasks
+
+def load_labels(path):
+    # CSV with source,frame,label columns; a blank frame labels a whole clip
+    labels = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            label = row["label"].strip().lower() or "none"
+            labels[(row["source"].strip(), row.get("frame", "").strip())] = label
+    return labels
+
+def lookup_label(labels, source, frame):
+    label = labels.get((source, frame))
+    if label is None:
+        label = labels.get((source, ""))
+    return label
+
+def confusion_matrix(predictions, labels):
+    # Rows are true labels, columns are predictions, ordered as CLASSES
+    matrix = np.zeros((len(CLASSES), len(CLASSES)), dtype=np.int64)
+    for source, frame, prediction in predictions:
+        label = lookup_label(labels, source, frame)
+        if label is None or label not in CLASSES:
+            continue
+        matrix[CLASSES.index(label), CLASSES.index(prediction or "none")] += 1
+    return matrix
+
+def evaluate(sources, labels_path=None, workers=None, detect_scale=0.5):
+    tasks = build_tasks(sources)
+    start = time.time()
+    predictions = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(detect_scale,)) as executor:
+        for result in executor.map(_run_task, tasks):
+            predictions.extend(result)
+    elapsed = time.time() - start
+
+    report = {
+        "frames": len(predictions),
+        "seconds": round(elapsed, 3),
+        "fps": round(len(predictions) / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    if labels_path:
+        matrix = confusion_matrix(predictions, load_labels(labels_path))
+        total = int(matrix.sum())
+        report["classes"] = CLASSES
+        report["confusion_matrix"] = matrix.tolist()
+        report["labelled_frames"] = total
+        report["accuracy"] = round(float(np.trace(matrix)) / total, 4) if total else None
+    return predictions, report
+
+def write_predictions(path, predictions, labels=None):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["source", "frame", "prediction", "label"])
+        for source, frame, prediction in predictions:
+            label = lookup_label(labels, source, frame) if labels else None
+            writer.writerow([source, frame, prediction or "none", label or ""])
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate gesture detection on recorded videos or image folders")
+    parser.add_argument("sources", nargs="+", help="video files or directories of images")
+    parser.add_argument("--labels", help="CSV with source,frame,label columns")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--detect-scale", type=float, default=0.5)
+    parser.add_argument("--predictions", default="predictions.csv", help="per-frame output CSV")
+    parser.add_argument("--report", help="write the summary report as JSON")
+    args = parser.parse_args()
+
+    predictions, report = evaluate(args.sources, args.labels, args.workers, args.detect_scale)
+    write_predictions(args.predictions, predictions, load_labels(args.labels) if args.labels else None)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import gestures
+from compositor import GameCompositor
+from engine import CvzoneDetector, MediaPipeDetector, fingers_to_gesture
+
+FRAME_SIZE = (640, 480)
+# Microsecond-level stages need many more samples for a stable p95
+MIN_ITERATIONS = {"game.classify": 20000, "main.get_player_choice": 20000}
+
+def synthetic_frames(count, seed=0):
+    # Deterministic smooth-noise frames so runs are comparable without a camera
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(count):
+        small = rng.integers(0, 256, size=(30, 40, 3), dtype=np.uint8)
+        frames.append(cv2.resize(small, FRAME_SIZE, interpolation=cv2.INTER_CUBIC))
+    return frames
+
+def recorded_frames(path, count):
+    frames = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            frame = cv2.imread(os.path.join(path, name))
+            if frame is not None:
+                frames.append(cv2.resize(frame, FRAME_SIZE))
+            if len(frames) >= count:
+                break
+    else:
+        capture = cv2.VideoCapture(path)
+        while len(frames) < count:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames.append(cv2.resize(frame, FRAME_SIZE))
+        capture.release()
+    return frames
+
+def peak_rss_mb():
+    # Process-wide high-water mark, so it is only reported for the whole
+    # run; ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure(name, fn, inputs, iterations, warmup):
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+
+    durations = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        item = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(item)
+        durations[i] = time.perf_counter() - start
+
+    ms = durations * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+        "fps": round(float(iterations / durations.sum()), 1),
+        "iterations": iterations
+    }
+
+def game_stages(frames, landmarks):
+    # Stages of game.py's loop, built without opening the camera
+    detector = MediaPipeDetector()
+
+    def detect_gesture(frame):
+        detection = detector.detect(frame)
+        detector.draw(frame, detection)
+        return detection.gesture
+
+    bg_image = cv2.resize(cv2.imread('assets/bg.jpg'), (1580, 920))
+    ai_images = {
+        'rock': cv2.resize(cv2.imread('assets/rock.jpg'), FRAME_SIZE),
+        'paper': cv2.resize(cv2.imread('assets/paper.jpg'), FRAME_SIZE),
+        'scissors': cv2.resize(cv2.imread('assets/scissor.jpg'), FRAME_SIZE)
+    }
+    compositor = GameCompositor(bg_image, ai_images)
+
+    def create_game_page(frame):
+        game_frame = compositor.game_page(frame, 'rock', "Round: 1/3", "Human: 0 AI: 0")
+        compositor.put_text(game_frame, "3", (600, 400), 4, 8)
+        return game_frame
+
+    batch = np.stack(landmarks)
+    return [
+        ("game.detect_gesture", detect_gesture, frames),
+        ("game.classify", gestures.classify, landmarks),
+        ("game.classify_batch_1000", gestures.classify_batch, [batch[:1000]]),
+        ("game.create_game_page", create_game_page, frames)
+    ]
+
+def cvzone_stages(frames):
+    # main.py's cvzone path; skipped when cvzone is not installed
+    try:
+        detector = CvzoneDetector(max_hands=1)
+    except ImportError:
+        print("cvzone not installed, skipping cvzone stages", file=sys.stderr)
+        return []
+
+    def find_hands(frame):
+        return detector.detect(frame.copy()).gesture
+
+    fingers = [[0, 0, 0, 0, 0], [1, 1, 1, 1, 1], [0, 1, 1, 0, 0], [1, 0, 1, 0, 1]]
+    return [
+        ("main.findHands", find_hands, frames),
+        ("main.get_player_choice", fingers_to_gesture, fingers)
+    ]
+
+def compare(results, baseline, tolerance, min_slack_ms):
+    # A stage regresses when its p95 is worse than baseline by more than
+    # tolerance, and by more than min_slack_ms so timer noise on very fast
+    # stages is not reported
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            continue
+        limit = max(base["p95_ms"] * (1 + tolerance), base["p95_ms"] + min_slack_ms)
+        if stats["p95_ms"] > limit:
+            regressions.append(f"{name}: p95 {stats['p95_ms']} ms > {limit:.4f} ms "
+                               f"(baseline {base['p95_ms']} ms)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gesture detection and rendering stages")
+    parser.add_argument("--frames", help="video file or image directory to replay (default: synthetic)")
+    parser.add_argument("--count", type=int, default=60, help="number of frames to replay")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="write results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed p95 slowdown vs baseline (0.15 = 15%%)")
+    parser.add_argument("--min-slack-ms", type=float, default=0.05,
+                        help="p95 slowdowns smaller than this never count as regressions")
+    args = parser.parse_args()
+
+    frames = recorded_frames(args.frames, args.count) if args.frames else synthetic_frames(args.count)
+    if not frames:
+        parser.error("no frames could be read")
+    rng = np.random.default_rng(1)
+    landmarks = list(rng.random((1000, gestures.NUM_LANDMARKS, 3), dtype=np.float32))
+
+    stages = game_stages(frames, landmarks) + cvzone_stages(frames)
+    results = {}
+    for name, fn, inputs in stages:
+        iterations = max(args.iterations, MIN_ITERATIONS.get(name, 0))
+        results[name] = measure(name, fn, inputs, iterations, args.warmup)
+        print(f"{name:28s} p50 {results[name]['p50_ms']:9.3f} ms  "
+              f"p95 {results[name]['p95_ms']:9.3f} ms  {results[name]['fps']:10.1f} fps",
+              file=sys.stderr)
+
+    report = {
+        "frames": "recorded" if args.frames else "synthetic",
+        "iterations": args.iterations,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": results
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_slack_ms)
+        if regressions:
+            print("PERFORMANCE REGRESSION:", file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import sys
+import threading
+import time
+
+import cv2
+
+from pipeline import LatestQueue, StageStats
+
+STREAM_PREFIXES = ("rtsp://", "rtmp://", "http://", "https://", "udp://", "tcp://")
+
+def parse_source(source):
+    # "0" is camera 0, URLs are network streams, anything else a video file
+    source = str(source)
+    if source.isdigit():
+        return "camera", int(source)
+    if source.startswith(STREAM_PREFIXES):
+        return "stream", source
+    return "file", source
+
+def backend_for(kind):
+    # The platform's native camera API opens faster and honours MJPG and
+    # buffer size settings more reliably than whatever CAP_ANY picks
+    if kind == "camera":
+        if sys.platform.startswith("linux"):
+            return cv2.CAP_V4L2
+        if sys.platform == "win32":
+            return cv2.CAP_DSHOW
+        if sys.platform == "darwin":
+            return cv2.CAP_AVFOUNDATION
+    if kind == "stream":
+        return cv2.CAP_FFMPEG
+    return cv2.CAP_ANY
+
+def open_capture(source, width=640, height=480, fps=None, mjpg=True, buffer_size=1):
+    kind, target = parse_source(source)
+    backend = backend_for(kind)
+    cap = cv2.VideoCapture(target, backend)
+    if not cap.isOpened() and backend != cv2.CAP_ANY:
+        cap = cv2.VideoCapture(target)
+    if kind == "camera":
+        # FOURCC goes first: many USB cameras only offer full frame rate
+        # at 640x480 and above as MJPG, not raw YUYV
+        if mjpg:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            cap.set(cv2.CAP_PROP_FPS, fps)
+    if kind != "file":
+        # Keep the driver from queueing stale frames behind the newest one
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+    return kind, cap
+
+class CaptureSource:
+    # One camera, video file or stream read on its own grab thread. Only
+    # the newest frame is kept; frames replaced before anyone read them are
+    # counted as dropped. Files play back at their own frame rate (looping
+    # if asked) and streams are reopened after a failed read. read() and
+    # release() match cv2.VideoCapture, so a source can stand in for one.
+    def __init__(self, source, name=None, width=640, height=480, fps=None, mjpg=True,
+                 buffer_size=1, loop=True, reconnect_delay=1.0, on_frame=None):
+        self.source = source
+        self.name = name or str(source)
+        self.settings = {"width": width, "height": height, "fps": fps, "mjpg": mjpg,
+                         "buffer_size": buffer_size}
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        # Called on the grab thread with (source, frame) for every frame
+        self.on_frame = on_frame
+
+        self.kind, self.cap = open_capture(source, **self.settings)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"could not open video source {source!r}")
+        self.nominal_fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+
+        self.frames = LatestQueue(1)
+        self.stats = StageStats(self.name)
+        self.missed = 0
+        self.read_errors = 0
+        self.reconnects = 0
+        self.last_time = None
+        self.ended = False
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def release(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        self.cap.release()
+
+    def read(self, timeout=0.1):
+        # Newest frame not returned before, waiting up to timeout for one
+        packet = self.frames.get_latest(timeout)
+        if packet is None:
+            return False, None
+        return True, packet[1]
+
+    def latest(self):
+        # (timestamp, frame) of the newest unread frame, without waiting
+        return self.frames.get_latest()
+
+    def _grab_loop(self):
+        interval = 1.0 / self.nominal_fps if self.kind == "file" and self.nominal_fps else 0.0
+        next_due = time.time()
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                self._handle_failed_read()
+                continue
+
+            now = time.time()
+            self._count_missed(now)
+            self.frames.put((now, frame))
+            self.stats.tick()
+            if self.on_frame:
+                self.on_frame(self, frame)
+
+            if interval:
+                # Pace files like a live camera instead of decoding flat out
+                next_due = max(next_due + interval, now - interval)
+                time.sleep(max(0.0, next_due - time.time()))
+
+    def _handle_failed_read(self):
+        if self.kind == "file":
+            if self.loop:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            else:
+                self.ended = True
+                self.running = False
+            return
+        self.read_errors += 1
+        if self.kind == "stream":
+            self.cap.release()
+            time.sleep(self.reconnect_delay)
+            self.reconnects += 1
+            _, self.cap = open_capture(self.source, **self.settings)
+            self.last_time = None
+        else:
+            time.sleep(0.005)
+
+    def _count_missed(self, now):
+        # Frames the device produced but we never got, estimated from gaps
+        # longer than one and a half nominal frame intervals
+        if self.kind != "file" and self.nominal_fps and self.last_time is not None:
+            gap = (now - self.last_time) * self.nominal_fps
+            if gap > 1.5:
+                self.missed += int(round(gap)) - 1
+        self.last_time = now
+
+    def report(self):
+        return {
+            "kind": self.kind,
+            "capture_fps": round(self.stats.fps, 1),
+            "nominal_fps": round(self.nominal_fps, 1),
+            "frames": self.stats.count,
+            "dropped": self.frames.dropped,
+            "missed": self.missed,
+            "read_errors": self.read_errors,
+            "reconnects": self.reconnects,
+            "resolution": [int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                           int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))]
+        }
+
+class InputManager:
+    # Several sources opened at once, each with its own grab thread. With a
+    # GameServer, every source gets a session and its grab thread submits
+    # frames to the shared inference pool while inference is enabled for it.
+    def __init__(self, sources, server=None, **settings):
+        self.server = server
+        self.sources = {}
+        self.sessions = {}
+        self.inference = {}
+        for source in sources:
+            capture = CaptureSource(source, on_frame=self._submit if server else None, **settings)
+            if capture.name in self.sources:
+                raise ValueError(f"duplicate video source {capture.name!r}")
+            self.sources[capture.name] = capture
+            self.inference[capture.name] = threading.Event()
+            if server:
+                self.sessions[capture.name] = server.open_session()
+
+    def start(self):
+        for capture in self.sources.values():
+            capture.start()
+        return self
+
+    def stop(self):
+        for name, capture in self.sources.items():
+            capture.release()
+            if self.server:
+                self.server.close_session(self.sessions[name])
+
+    def set_inference(self, name, enabled):
+        if enabled:
+            self.inference[name].set()
+        else:
+            self.inference[name].clear()
+
+    def _submit(self, capture, frame):
+        if self.inference[capture.name].is_set():
+            self.server.submit(self.sessions[capture.name], frame)
+
+    def reset_results(self, name):
+        self.server.reset_session(self.sessions[name])
+
+    def take_result(self, name):
+        return self.server.take_result(self.sessions[name])
+
+    def report(self):
+        report = {"sources": {name: capture.report() for name, capture in self.sources.items()}}
+        if self.server:
+            report["inference"] = self.server.stats()
+        return report
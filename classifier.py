@@ -0,0 +1,290 @@
+import argparse
+import csv
+import json
+import time
+
+import numpy as np
+
+import gestures
+from gestures import FINGER_PIPS, FINGER_TIPS, GESTURES, NO_GESTURE, NUM_LANDMARKS
+
+# Model outputs; "none" is trained from frames labelled as no gesture
+CLASSES = GESTURES + ("none",)
+NONE_CLASS = CLASSES.index("none")
+DEFAULT_MODEL = "gesture_model.npz"
+# Wrist to middle-finger MCP sets the hand's scale
+MIDDLE_MCP = 9
+
+def features(points):
+    # (N, 67) float32: landmarks relative to the wrist, divided by palm
+    # size, so position and distance from the camera drop out, followed by
+    # the bend angle at each finger's middle joint
+    points = gestures.as_batch(points)[:, :, :3]
+    rel = points - points[:, :1]
+    palm = rel[:, MIDDLE_MCP]
+    scale = np.sqrt((palm * palm).sum(axis=1))
+    rel /= np.maximum(scale, 1e-6)[:, np.newaxis, np.newaxis]
+    return np.concatenate([rel.reshape(len(rel), -1), gestures.joint_angles(points)], axis=1)
+
+def mirrored(points):
+    # The same hands seen as the other hand; x is normalized to [0, 1]
+    points = np.array(points, dtype=np.float32)
+    points[:, :, 0] = 1.0 - points[:, :, 0]
+    return points
+
+class GestureModel:
+    # Small MLP (softmax regression when there are no hidden layers) over
+    # normalized landmarks. Inference is plain NumPy; feature scaling is
+    # folded into the first layer, so a hand costs a few array operations.
+    def __init__(self, layers, classes=CLASSES, min_probability=0.0):
+        self.layers = [(np.ascontiguousarray(w, dtype=np.float32), np.asarray(b, dtype=np.float32))
+                       for w, b in layers]
+        self.hidden = self.layers[:-1]
+        self.output = self.layers[-1]
+        self.classes = tuple(classes)
+        self.min_probability = min_probability
+        # Model class index -> gesture code, with "none" as NO_GESTURE
+        self.codes = np.array([gestures.GESTURE_CODES.get(c, NO_GESTURE) for c in self.classes],
+                              dtype=np.int8)
+
+    def logits(self, points):
+        x = features(points)
+        for w, b in self.hidden:
+            x = x @ w
+            x += b
+            np.maximum(x, 0, out=x)
+        w, b = self.output
+        return x @ w + b
+
+    def predict(self, points):
+        # Class indices into self.classes
+        logits = self.logits(points)
+        best = logits.argmax(axis=1)
+        if self.min_probability > 0:
+            logits -= logits.max(axis=1, keepdims=True)
+            probability = 1.0 / np.exp(logits).sum(axis=1)
+            best[probability < self.min_probability] = self.classes.index("none")
+        return best
+
+    def classify_batch(self, points):
+        # Same contract as gestures.classify_batch
+        return self.codes[self.predict(points)]
+
+    def save(self, path):
+        arrays = {f"w{i}": w for i, (w, _) in enumerate(self.layers)}
+        arrays.update({f"b{i}": b for i, (_, b) in enumerate(self.layers)})
+        np.savez(path, classes=np.array(self.classes), min_probability=self.min_probability,
+                 layers=len(self.layers), **arrays)
+
+def load_model(path, min_probability=None):
+    with np.load(path) as data:
+        layers = [(data[f"w{i}"], data[f"b{i}"]) for i in range(int(data["layers"]))]
+        model = GestureModel(layers, [str(c) for c in data["classes"]],
+                             float(data["min_probability"]))
+    if min_probability is not None:
+        model.min_probability = min_probability
+    return model
+
+# Datasets
+
+def load_csv(path):
+    # One hand per row: a label column (a gesture or "none") and x0,y0,z0
+    # ... x20,y20,z20 in MediaPipe's normalized coordinates
+    columns = [f"{axis}{i}" for i in range(NUM_LANDMARKS) for axis in "xyz"]
+    points, labels = [], []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            label = row["label"].strip().lower() or "none"
+            if label not in CLASSES:
+                continue
+            points.append([float(row[column]) for column in columns])
+            labels.append(CLASSES.index(label))
+    return (np.array(points, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3),
+            np.array(labels, dtype=np.int64))
+
+def load_session(path, tail=10):
+    # Landmarks from a recorded session (session_log.py), labelled with the
+    # move the player went on to commit: the last `tail` hands seen in
+    # each playing state before its round
+    from session_log import read_session
+
+    log = read_session(path)
+    # Detections are only fed while playing, up to and including the
+    # frame that committed the move
+    has_hand = (log.fed == 1) & ~np.isnan(log.landmarks[:, 0, 0])
+    rows, labels = [], []
+    start = 0
+    for event in log.events:
+        if event["kind"] == "state" and event["state"] == "playing":
+            start = event["frame"]
+        elif event["kind"] == "round" and isinstance(event["human"], str):
+            span = np.arange(start, min(event["frame"] + 1, log.rows))
+            span = span[has_hand[span]][-tail:]
+            rows.extend(span)
+            labels.extend([CLASSES.index(event["human"])] * len(span))
+    return log.landmarks[np.array(rows, dtype=np.int64)], np.array(labels, dtype=np.int64)
+
+def load_dataset(paths, tail=10):
+    parts = [load_csv(path) if path.endswith(".csv") else load_session(path, tail) for path in paths]
+    points = np.concatenate([p for p, _ in parts]) if parts else np.zeros((0, NUM_LANDMARKS, 3))
+    labels = np.concatenate([l for _, l in parts]) if parts else np.zeros(0, dtype=np.int64)
+    return points.astype(np.float32), labels
+
+def split(points, labels, test_fraction, seed=0):
+    order = np.random.default_rng(seed).permutation(len(labels))
+    test = int(len(labels) * test_fraction)
+    return (points[order[test:]], labels[order[test:]]), (points[order[:test]], labels[order[:test]])
+
+# Training
+
+def train(points, labels, hidden=(32,), epochs=200, lr=0.01, weight_decay=1e-4,
+          batch_size=256, mirror=True, seed=0):
+    # Mini-batch Adam on softmax cross-entropy. Mirrored copies make the
+    # model indifferent to which hand is shown.
+    if mirror:
+        points = np.concatenate([points, mirrored(points)])
+        labels = np.concatenate([labels, labels])
+    x = features(points).astype(np.float64)
+    mean = x.mean(axis=0)
+    std = x.std(axis=0) + 1e-6
+    x = (x - mean) / std
+    targets = np.eye(len(CLASSES))[labels]
+
+    rng = np.random.default_rng(seed)
+    sizes = [x.shape[1], *hidden, len(CLASSES)]
+    params = []
+    for fan_in, fan_out in zip(sizes[:-1], sizes[1:]):
+        params.append(rng.normal(0, np.sqrt(2.0 / fan_in), (fan_in, fan_out)))
+        params.append(np.zeros(fan_out))
+    moments = [np.zeros_like(p) for p in params]
+    velocities = [np.zeros_like(p) for p in params]
+
+    step = 0
+    for _ in range(epochs):
+        order = rng.permutation(len(x))
+        for start in range(0, len(x), batch_size):
+            batch = order[start:start + batch_size]
+            activations = [x[batch]]
+            for i in range(0, len(params) - 2, 2):
+                activations.append(np.maximum(activations[-1] @ params[i] + params[i + 1], 0))
+            logits = activations[-1] @ params[-2] + params[-1]
+            logits -= logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+
+            grads = [None] * len(params)
+            delta = (probs - targets[batch]) / len(batch)
+            for i in range(len(params) - 2, -1, -2):
+                grads[i] = activations[i // 2].T @ delta + weight_decay * params[i]
+                grads[i + 1] = delta.sum(axis=0)
+                if i:
+                    delta = (delta @ params[i].T) * (activations[i // 2] > 0)
+
+            step += 1
+            for p, g, m, v in zip(params, grads, moments, velocities):
+                m *= 0.9
+                m += 0.1 * g
+                v *= 0.999
+                v += 0.001 * g * g
+                p -= lr * (m / (1 - 0.9 ** step)) / (np.sqrt(v / (1 - 0.999 ** step)) + 1e-8)
+
+    # Fold standardization into the first layer: ((x - mean) / std) @ w
+    # == x @ (w / std) - (mean / std) @ w
+    params[0] = params[0] / std[:, np.newaxis]
+    params[1] = params[1] - mean @ params[0]
+    return GestureModel(list(zip(params[::2], params[1::2])))
+
+# Evaluation
+
+def fingers_up(points):
+    # cvzone's fingersUp for a right hand: thumb tip outside its IP joint,
+    # other fingertips above their PIP joints
+    thumb = points[:, 4, 0] > points[:, 3, 0]
+    others = points[:, FINGER_TIPS, 1] < points[:, FINGER_PIPS, 1]
+    return np.column_stack([thumb, others]).astype(int)
+
+def rule_predictions(points):
+    # Class indices from the landmark rules and from the finger-count rule
+    from engine import fingers_to_gesture
+
+    codes = gestures.classify_batch(points)
+    landmark_rule = np.where(codes == NO_GESTURE, NONE_CLASS, codes)
+    finger_rule = np.array([CLASSES.index(fingers_to_gesture(list(f)) or "none")
+                            for f in fingers_up(points)], dtype=np.int64)
+    return {"landmark_rules": landmark_rule, "finger_count_rule": finger_rule}
+
+def per_hand_us(classify, points, repeats=2000):
+    # Median single-hand latency and batched cost per hand, in microseconds
+    hands = points[np.arange(repeats) % len(points)]
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        classify(hands[i])
+        timings[i] = time.perf_counter() - start
+    start = time.perf_counter()
+    classify(points)
+    batched = (time.perf_counter() - start) / len(points)
+    return {"single_us": round(float(np.median(timings)) * 1e6, 2),
+            "single_p99_us": round(float(np.percentile(timings, 99)) * 1e6, 2),
+            "batched_us": round(batched * 1e6, 3)}
+
+def compare(model, points, labels):
+    predictions = rule_predictions(points)
+    predictions["model"] = model.predict(points)
+    report = {"hands": len(labels), "classes": list(CLASSES)}
+    for name, predicted in predictions.items():
+        matrix = np.zeros((len(CLASSES), len(CLASSES)), dtype=np.int64)
+        np.add.at(matrix, (labels, predicted), 1)
+        report[name] = {
+            "accuracy": round(float(np.mean(predicted == labels)), 4) if len(labels) else None,
+            "confusion_matrix": matrix.tolist()
+        }
+    if len(points):
+        report["model"]["latency"] = per_hand_us(model.classify_batch, points)
+        report["landmark_rules"]["latency"] = per_hand_us(gestures.classify_batch, points)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate the learned gesture classifier")
+    parser.add_argument("command", choices=["train", "report"])
+    parser.add_argument("data", nargs="+",
+                        help="landmark CSVs (label,x0,y0,z0,...) or recorded session logs")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--hidden", type=int, nargs="*", default=[32],
+                        help="hidden layer sizes (none = softmax regression)")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--lr", type=float, default=0.01)
+    parser.add_argument("--weight-decay", type=float, default=1e-4)
+    parser.add_argument("--test-split", type=float, default=0.2,
+                        help="fraction held out for the report when training")
+    parser.add_argument("--session-tail", type=int, default=10,
+                        help="hands per round taken from session logs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="write the report as JSON")
+    args = parser.parse_args()
+
+    points, labels = load_dataset(args.data, args.session_tail)
+    if not len(labels):
+        parser.error("no labelled hands found in " + ", ".join(args.data))
+
+    if args.command == "train":
+        (train_points, train_labels), (points, labels) = split(points, labels, args.test_split, args.seed)
+        start = time.perf_counter()
+        model = train(train_points, train_labels, args.hidden, args.epochs, args.lr,
+                      args.weight_decay, seed=args.seed)
+        print(f"Trained on {len(train_labels)} hands in {time.perf_counter() - start:.1f}s, "
+              f"saved to {args.model}")
+        model.save(args.model)
+        if not len(labels):
+            return
+    else:
+        model = load_model(args.model)
+
+    report = compare(model, points, labels)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
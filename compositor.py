@@ -0,0 +1,113 @@
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+WHITE = (255, 255, 255)
+
+# Screen regions as (y0, y1, x0, x1)
+CAMERA_RECT = (120, 600, 0, 640)
+AI_RECT = (120, 600, 640, 1280)
+
+def rects_overlap(a, b):
+    return a[0] < b[1] and b[0] < a[1] and a[2] < b[3] and b[2] < a[3]
+
+class GameCompositor:
+    # Builds game screens from cached layers into one reused output buffer.
+    # The background plus round/score text is prerendered and only rebuilt
+    # when the text changes; each frame only the camera rectangle, the AI
+    # panel and regions dirtied by overlay text are redrawn.
+    def __init__(self, bg_image, ai_images):
+        self.bg_image = bg_image
+        self.ai_images = ai_images
+        self.height, self.width = bg_image.shape[:2]
+
+        self.start_layer = None
+        self.static_layer = np.empty_like(bg_image)
+        self.static_key = None
+        self.output = np.empty_like(bg_image)
+
+        self.ai_panel = None
+        self.dirty_rects = []
+        self.needs_full_redraw = True
+
+    def reset(self):
+        self.static_key = None
+        self.needs_full_redraw = True
+
+    def start_page(self):
+        if self.start_layer is None:
+            layer = self.bg_image.copy()
+
+            # Add game title
+            cv2.putText(layer, "ROCK PAPER SCISSORS",
+                        (320, 200), FONT, 2.5, WHITE, 5)
+
+            # Create start button
+            button_x, button_y = 490, 350
+            button_w, button_h = 350, 80
+            cv2.rectangle(layer, (button_x, button_y),
+                         (button_x + button_w, button_y + button_h), (0, 255, 0), -1)
+            cv2.putText(layer, "START GAME",
+                        (button_x + 50, button_y + 50),
+                        FONT, 1.5, WHITE, 3)
+            self.start_layer = layer
+        return self.start_layer
+
+    def _build_static_layer(self, key):
+        round_text, score_text = key
+        np.copyto(self.static_layer, self.bg_image)
+        cv2.putText(self.static_layer, round_text, (550, 50), FONT, 1, WHITE, 2)
+        cv2.putText(self.static_layer, score_text, (550, 80), FONT, 1, WHITE, 2)
+        self.static_key = key
+        self.needs_full_redraw = True
+
+    def _restore(self, rect):
+        y0, y1, x0, x1 = rect
+        self.output[y0:y1, x0:x1] = self.static_layer[y0:y1, x0:x1]
+
+    def game_page(self, human_frame, ai_move, round_text, score_text):
+        key = (round_text, score_text)
+        if key != self.static_key:
+            self._build_static_layer(key)
+
+        if self.needs_full_redraw:
+            np.copyto(self.output, self.static_layer)
+            self.dirty_rects = []
+            self.ai_panel = None
+            self.needs_full_redraw = False
+
+        # Undo last frame's overlay text
+        for rect in self.dirty_rects:
+            self._restore(rect)
+            if rects_overlap(rect, AI_RECT):
+                self.ai_panel = "dirty"
+        self.dirty_rects = []
+
+        # Camera rectangle changes every frame
+        y0, y1, x0, x1 = CAMERA_RECT
+        camera = self.output[y0:y1, x0:x1]
+        if human_frame.shape[:2] == (y1 - y0, x1 - x0):
+            np.copyto(camera, human_frame)
+        else:
+            camera[:] = cv2.resize(human_frame, (x1 - x0, y1 - y0))
+
+        # AI panel only changes when the shown move does
+        if ai_move != self.ai_panel:
+            if ai_move:
+                y0, y1, x0, x1 = AI_RECT
+                np.copyto(self.output[y0:y1, x0:x1], self.ai_images[ai_move])
+            else:
+                self._restore(AI_RECT)
+            self.ai_panel = ai_move
+
+        return self.output
+
+    def put_text(self, frame, text, org, scale, thickness):
+        # Draw overlay text and remember its area so the next frame restores it
+        cv2.putText(frame, text, org, FONT, scale, WHITE, thickness)
+        if frame is self.output:
+            (w, h), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+            x, y = org
+            pad = thickness
+            self.dirty_rects.append((max(0, y - h - pad), min(self.height, y + baseline + pad),
+                                     max(0, x - pad), min(self.width, x + w + pad)))
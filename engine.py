@@ -0,0 +1,315 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import gestures
+from opponents import make_opponent
+from scheduler import InferenceScheduler
+
+MOVES = ("rock", "paper", "scissors")
+BEATS = {"rock": "scissors", "paper": "rock", "scissors": "paper"}
+
+# One detected hand: its gesture (or None), the backend's hand object, a
+# confidence score and whether inference ran on this frame (False when a
+# skipped frame repeats the last result)
+Detection = namedtuple("Detection", ["gesture", "hand", "score", "fresh"], defaults=[True])
+NO_DETECTION = Detection(None, None, 0.0)
+
+def round_winner(human_move, ai_move):
+    if human_move == ai_move:
+        return "tie"
+    if BEATS[human_move] == ai_move:
+        return "human"
+    return "ai"
+
+def fingers_to_gesture(fingers):
+    # Finger-count rule used with cvzone's fingersUp output
+    if sum(fingers) == 0:
+        return "rock"
+    elif sum(fingers) == 5:
+        return "paper"
+    elif sum(fingers) == 2 and fingers[1] and fingers[2]:
+        return "scissors"
+    return None
+
+class MediaPipeDetector:
+    # Raw MediaPipe Hands backend using the shared NumPy classifier, or a
+    # learned one (classifier.GestureModel) if given. The scheduler handles
+    # frame skipping and hand-region tracking.
+    def __init__(self, min_detection_confidence=0.7, min_tracking_confidence=0.7,
+                 static_image_mode=False, every_n=1, detect_scale=0.5,
+                 roi_tracking=True, active=True, max_num_hands=1, classifier=None):
+        import mediapipe as mp
+
+        self.mp_hands = mp.solutions.hands
+        self.mp_draw = mp.solutions.drawing_utils
+        self.hands = self.mp_hands.Hands(
+            static_image_mode=static_image_mode,
+            max_num_hands=max_num_hands,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+        # A single-hand crop would hide the other hands
+        self.scheduler = InferenceScheduler(self.hands, every_n=every_n, detect_scale=detect_scale,
+                                            roi_tracking=roi_tracking and max_num_hands == 1)
+        self.scheduler.set_active(active)
+        self.buffer = gestures.LandmarkBuffer()
+        self.batch = gestures.LandmarkBatch(max_num_hands)
+        self.classify_batch = classifier.classify_batch if classifier else gestures.classify_batch
+
+    def set_active(self, active):
+        self.scheduler.set_active(active)
+
+    def reset(self):
+        self.scheduler.reset()
+
+    def skip(self):
+        self.scheduler.skip()
+
+    @property
+    def fresh(self):
+        # Whether the last detect/detect_all call actually ran inference
+        return self.scheduler.ran
+
+    def detect(self, frame):
+        hand_landmarks = self.scheduler.process(frame)
+        if hand_landmarks is None:
+            return NO_DETECTION._replace(fresh=self.fresh)
+        code = self.classify_batch(self.buffer.fill(hand_landmarks))[0]
+        gesture = gestures.GESTURES[code] if code != gestures.NO_GESTURE else None
+        return Detection(gesture, hand_landmarks, self.scheduler.last_score, self.fresh)
+
+    def detect_all(self, frame):
+        # Every hand in the frame, classified in one vectorized pass.
+        # Returns the detections and their (hands, 21, 3) landmark array.
+        hands, scores = self.scheduler.process_all(frame)
+        points = self.batch.fill(hands)
+        labels = gestures.labels(self.classify_batch(points)) if len(points) else []
+        return [Detection(*fields, self.fresh) for fields in zip(labels, hands, scores)], points
+
+    def draw(self, frame, detection):
+        if detection.hand is not None:
+            self.mp_draw.draw_landmarks(frame, detection.hand, self.mp_hands.HAND_CONNECTIONS)
+
+    def report(self):
+        return self.scheduler.report()
+
+    def close(self):
+        self.hands.close()
+
+class CvzoneDetector:
+    # cvzone HandDetector backend with the finger-count rule, or a learned
+    # classifier if given. findHands draws the hand onto the frame as part
+    # of detection.
+    def __init__(self, max_hands=1, detection_con=0.5, classifier=None):
+        from cvzone.HandTrackingModule import HandDetector
+
+        self.detector = HandDetector(maxHands=max_hands, detectionCon=detection_con)
+        self.classifier = classifier
+
+    def set_active(self, active):
+        pass
+
+    def reset(self):
+        pass
+
+    def skip(self):
+        pass
+
+    def detect(self, frame):
+        hands, _ = self.detector.findHands(frame)
+        if not hands:
+            return NO_DETECTION
+        if self.classifier:
+            # lmList is in pixels; the model expects MediaPipe's normalized
+            # coordinates
+            height, width = frame.shape[:2]
+            points = np.asarray(hands[0]["lmList"], dtype=np.float32) / (width, height, width)
+            code = self.classifier.classify_batch(points)[0]
+            gesture = gestures.GESTURES[code] if code != gestures.NO_GESTURE else None
+            return Detection(gesture, hands[0], 1.0)
+        fingers = self.detector.fingersUp(hands[0])
+        return Detection(fingers_to_gesture(fingers), hands[0], 1.0)
+
+    def draw(self, frame, detection):
+        pass
+
+    def report(self):
+        return {}
+
+    def close(self):
+        pass
+
+# Wrist and finger bases; their mean is a stable palm centre
+PALM_POINTS = [0, 5, 9, 13, 17]
+
+class PlayerSlots:
+    # Keeps each hand in the same player slot from frame to frame by
+    # matching palm centres to where each slot was last seen. Hands that
+    # match no slot fill free slots left to right; any beyond that are
+    # spectators (-1). A slot is released after `max_missed` frames unseen.
+    def __init__(self, slots=2, max_distance=0.2, max_missed=15):
+        self.positions = np.full((slots, 2), np.nan, dtype=np.float32)
+        self.missed = np.zeros(slots, dtype=np.int32)
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+
+    def reset(self):
+        self.positions.fill(np.nan)
+        self.missed.fill(0)
+
+    def assign(self, points):
+        # Slot index per hand for landmarks shaped (hands, 21, 3+)
+        centres = points[:, PALM_POINTS, :2].mean(axis=1)
+        slots = np.full(len(centres), -1, dtype=np.int64)
+        known = ~np.isnan(self.positions[:, 0])
+
+        if len(centres) and known.any():
+            distances = np.linalg.norm(centres[:, np.newaxis] - self.positions[np.newaxis], axis=2)
+            distances[:, ~known] = np.inf
+            # Greedy nearest pairs; bounded by the number of slots
+            for _ in range(int(known.sum())):
+                hand, slot = np.unravel_index(np.argmin(distances), distances.shape)
+                if distances[hand, slot] > self.max_distance:
+                    break
+                slots[hand] = slot
+                distances[hand, :] = np.inf
+                distances[:, slot] = np.inf
+
+        free = np.flatnonzero(~known)
+        unmatched = [hand for hand in np.argsort(centres[:, 0]) if slots[hand] < 0]
+        for hand, slot in zip(unmatched, free):
+            slots[hand] = slot
+
+        seen = slots[slots >= 0]
+        self.positions[seen] = centres[slots >= 0]
+        self.missed += 1
+        self.missed[seen] = 0
+        expired = self.missed > self.max_missed
+        self.positions[expired] = np.nan
+        self.missed[expired] = 0
+        return slots
+
+class Match:
+    # Round and score state machine shared by every front-end.
+    # States: countdown -> playing -> break -> countdown ... -> finished
+    def __init__(self, max_rounds=3, countdown_seconds=3, break_seconds=2,
+                 opponent=None, on_state=None, on_round=None, clock=time.time):
+        self.max_rounds = max_rounds
+        self.countdown_seconds = countdown_seconds
+        self.break_seconds = break_seconds
+        # The opponent outlives reset() so it keeps learning across matches
+        self.opponent = opponent or make_opponent("random")
+        self.on_state = on_state
+        self.on_round = on_round
+        # Injected so recorded sessions replay on their original timeline
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.round = 0
+        self.human_score = 0
+        self.ai_score = 0
+        self.human_move = None
+        self.ai_move = None
+        self.round_result = None
+        self.set_state("countdown")
+
+    def set_state(self, state, now=None):
+        self.state = state
+        self.state_started = self.clock() if now is None else now
+        if self.on_state:
+            self.on_state(state)
+
+    def time_left(self, now=None):
+        now = self.clock() if now is None else now
+        if self.state == "countdown":
+            return int(self.countdown_seconds - (now - self.state_started))
+        if self.state == "break":
+            return int(self.break_seconds - (now - self.state_started))
+        return 0
+
+    def tick(self, now=None):
+        # Advances the timed states; returns seconds left in the state it was in
+        time_left = self.time_left(now)
+        if time_left <= 0:
+            if self.state == "countdown":
+                self.set_state("playing", now)
+            elif self.state == "break":
+                self.set_state("finished" if self.round >= self.max_rounds else "countdown", now)
+        return time_left
+
+    def choose_ai_move(self):
+        return self.opponent.choose()
+
+    def resolve_round(self, human_move, ai_move=None):
+        self.human_move = human_move
+        self.ai_move = ai_move or self.choose_ai_move()
+        self.opponent.observe(self.human_move, self.ai_move)
+        self.round_result = round_winner(self.human_move, self.ai_move)
+        if self.round_result == "human":
+            self.human_score += 1
+        elif self.round_result == "ai":
+            self.ai_score += 1
+
+        self.round += 1
+        if self.on_round:
+            self.on_round(self)
+        self.set_state("break")
+        return self.round_result
+
+    @property
+    def finished(self):
+        return self.state == "finished"
+
+    def winner(self):
+        if self.human_score > self.ai_score:
+            return "human"
+        if self.human_score < self.ai_score:
+            return "ai"
+        return "tie"
+
+class MultiMatch(Match):
+    # Every player plays the same AI move each round; scores are kept per
+    # player slot. human_score/ai_score hold the totals over all players.
+    def __init__(self, players=2, **kwargs):
+        self.players = players
+        super().__init__(**kwargs)
+
+    def reset(self):
+        self.human_scores = [0] * self.players
+        self.ai_scores = [0] * self.players
+        self.human_moves = [None] * self.players
+        self.round_results = [None] * self.players
+        super().reset()
+
+    def resolve_round(self, human_moves, ai_move=None):
+        self.human_moves = list(human_moves)
+        self.ai_move = ai_move or self.choose_ai_move()
+        # The AI sees one move per round, as in a single-player match: the
+        # most common move, ties going to the lowest slot
+        group_move = max(self.human_moves, key=self.human_moves.count)
+        self.opponent.observe(group_move, self.ai_move)
+        for player, move in enumerate(self.human_moves):
+            result = round_winner(move, self.ai_move)
+            self.round_results[player] = result
+            if result == "human":
+                self.human_scores[player] += 1
+            elif result == "ai":
+                self.ai_scores[player] += 1
+        self.human_score = sum(self.human_scores)
+        self.ai_score = sum(self.ai_scores)
+
+        self.round += 1
+        if self.on_round:
+            self.on_round(self)
+        self.set_state("break")
+        return self.round_results
+
+    def player_winner(self, player):
+        if self.human_scores[player] > self.ai_scores[player]:
+            return "human"
+        if self.human_scores[player] < self.ai_scores[player]:
+            return "ai"
+        return "tie"
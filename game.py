@@ -1,44 +1,127 @@
 import cv2
 import numpy as np
-import mediapipe as mp
-import random
 import time
 from pygame import mixer
 import os
+import argparse
+import json
+from pipeline import FramePipeline
+from capture import CaptureSource
+from classifier import load_model
+import gestures
+from engine import Match, MediaPipeDetector, MultiMatch, PlayerSlots
+from opponents import STRATEGIES, make_opponent
+from compositor import GameCompositor
+from video_cache import VideoCache
+from profiler import FrameProfiler
+from session_log import ReplayOpponent, SessionRecorder, read_session
+from score_store import DEFAULT_PATH, MatchHistory, ScoreStore
+
+PROFILE_STAGES = ("capture", "inference", "draw", "compose", "display", "waitkey")
 
 class RockPaperScissors:
-    def __init__(self):
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
-        self.mp_draw = mp.solutions.drawing_utils
+    def __init__(self, pipelined=False, infer_every=1, detect_scale=0.5,
+                 profile_path=None, show_overlay=False, stable_frames=3,
+                 stable_window=5, min_confidence=0.0, opponent="ensemble",
+                 record_path=None, record_frames=False, replay=None, redetect=False,
+                 scores_path=None, player="guest", players=1, max_hands=None,
+                 source=0, camera_fps=None, classifier_path=None):
+        # Frozen once per loop iteration so every timer in a frame agrees
+        # and a replay can run on the recorded timeline
+        self.now = time.time()
+        
+        # Hand detection only runs while a round is being played. With
+        # several players every hand is classified in one batch; hands
+        # beyond the player slots are shown as spectators.
+        self.players = players
+        classifier = load_model(classifier_path) if classifier_path else None
+        self.detector = MediaPipeDetector(every_n=infer_every, detect_scale=detect_scale,
+                                          active=False,
+                                          max_num_hands=max(max_hands or players, players),
+                                          classifier=classifier)
+        self.slots = PlayerSlots(players)
+        # A move is only committed once enough recent frames agree; each
+        # player has their own stabilizer and locks in a move independently
+        self.stabilizers = [gestures.GestureStabilizer(stable_window, stable_frames, min_confidence)
+                            for _ in range(players)]
+        self.stabilizer = self.stabilizers[0]
+        self.locked_moves = [None] * players
+        
+        # Camera, video file or stream on its own grab thread, so reads
+        # always get the newest frame; replays read frames from the log
+        self.cap = None
+        if replay is None:
+            self.cap = CaptureSource(source, width=640, height=480, fps=camera_fps).start()
+        
+        # Session recording and replay. Unless re-detecting, a replay feeds
+        # back the recorded detections instead of running the hand model.
+        self.replay = replay
+        self.replay_detections = replay is not None and not redetect
+        self.replay_row = 0
+        self.replayed_events = []
+        self.frame_detection = None
+        self.recorder = None
+        if record_path:
+            meta = {"max_rounds": 3, "stable_frames": stable_frames, "stable_window": stable_window,
+                    "min_confidence": min_confidence, "opponent": opponent,
+                    "pipelined": pipelined, "infer_every": infer_every, "detect_scale": detect_scale,
+                    "classifier": classifier_path}
+            self.recorder = SessionRecorder(record_path, meta, jpeg_quality=90 if record_frames else None)
         
-        # Initialize camera
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        # Optional capture/inference/render pipeline
+        self.pipelined = pipelined
+        self.pipeline = None
+        self.playing_since = 0
+        self.last_detection = None
+        
+        # Per-stage timings, off unless profiling or the overlay is requested
+        self.profile_path = profile_path
+        self.show_overlay = show_overlay
+        self.profiler = FrameProfiler(PROFILE_STAGES,
+                                      enabled=bool(profile_path or show_overlay or replay))
         
         # Load assets
         self.load_assets()
         
-        # Game states
+        # Round and score state: countdown, playing, break, finished
         self.page = "start"  # start, game, result
-        self.game_state = "countdown"  # countdown, playing, break
-        self.countdown_timer = 0
-        self.break_timer = 0
-        
-        # Score tracking
-        self.round = 0
-        self.max_rounds = 3
-        self.human_score = 0
-        self.ai_score = 0
+        self.result_started = 0
+        # Round and match history, written off the game thread; the store
+        # keeps one player per match, so multi-player matches are not saved
+        self.scores = ScoreStore(scores_path) if scores_path and players == 1 else None
+        on_round = MatchHistory(self.scores, player, "opencv").round_played if self.scores else None
         
-        # Move tracking
-        self.human_move = None
-        self.ai_move = None
-        self.round_result = None
+        ai = ReplayOpponent(replay.ai_moves()) if replay else make_opponent(opponent)
+        if players > 1:
+            self.match = MultiMatch(players=players, max_rounds=3, opponent=ai,
+                                    on_state=self.on_match_state, clock=self.clock)
+        else:
+            self.match = Match(max_rounds=3, opponent=ai, on_state=self.on_match_state,
+                               on_round=on_round, clock=self.clock)
+
+    def clock(self):
+        return self.now
+
+    def log_event(self, kind, **data):
+        event = dict(kind=kind, t=self.now, **data)
+        if self.recorder:
+            self.recorder.event(event)
+        if self.replay:
+            self.replayed_events.append(dict(event, frame=self.replay_row))
+
+    def start_game(self):
+        self.log_event("start")
+        self.page = "game"
+        self.match.set_state("countdown")
+
+    def reset_game(self):
+        # Reset per-game state only; the model, camera and assets are kept
+        self.log_event("reset")
+        self.page = "start"
+        self.result_started = 0
+        self.slots.reset()
+        self.match.reset()
+        self.compositor.reset()
 
     def load_assets(self):
         # Load and resize images
@@ -51,61 +134,50 @@ class RockPaperScissors:
             'scissors': cv2.resize(cv2.imread('assets/scissor.jpg'), (640, 480))
         }
         
-        # Load videos
-        self.win_video = cv2.VideoCapture('assets/win.mp4')
-        self.lose_video = cv2.VideoCapture('assets/lose.mp4')
+        # Decode result videos once in the background
+        self.videos = VideoCache((1580, 920))
+        self.videos.preload(['assets/win.mp4', 'assets/lose.mp4'])
+        self.result_buffer = np.empty_like(self.bg_image)
+        
+        self.compositor = GameCompositor(self.bg_image, self.ai_images)
 
     def create_start_page(self):
-        # Create start page with background and button
-        start_frame = self.bg_image.copy()
-        
-        # Add game title
-        cv2.putText(start_frame, "ROCK PAPER SCISSORS", 
-                    (320, 200), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (255, 255, 255), 5)
-        
-        # Create start button
-        button_x, button_y = 490, 350
-        button_w, button_h = 350, 80
-        cv2.rectangle(start_frame, (button_x, button_y), 
-                     (button_x + button_w, button_y + button_h), (0, 255, 0), -1)
-        cv2.putText(start_frame, "START GAME", 
-                    (button_x + 50, button_y + 50), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
-        
-        return start_frame
+        # Start page is static, so it is rendered once and reused
+        return self.compositor.start_page()
 
     def create_game_page(self, human_frame, show_ai=True):
-        game_frame = self.bg_image.copy()
-        
-        # Add human frame
-        human_frame = cv2.resize(human_frame, (640, 480))
-        game_frame[120:600, 0:640] = human_frame
-        
-        # Add AI frame if needed
-        if show_ai and self.ai_move:
-            ai_frame = self.ai_images[self.ai_move]
-            game_frame[120:600, 640:1280] = ai_frame
-        
-        # Add scores and round info
-        cv2.putText(game_frame, f"Round: {self.round}/{self.max_rounds}", 
-                    (550, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        cv2.putText(game_frame, f"Human: {self.human_score} AI: {self.ai_score}", 
-                    (550, 80), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        
-        return game_frame
+        match = self.match
+        ai_move = match.ai_move if show_ai else None
+        return self.compositor.game_page(
+            human_frame, ai_move,
+            f"Round: {match.round}/{match.max_rounds}",
+            self.score_text())
+
+    def score_text(self):
+        match = self.match
+        if self.players == 1:
+            return f"Human: {match.human_score} AI: {match.ai_score}"
+        return "  ".join(f"P{i + 1}: {match.human_scores[i]}-{match.ai_scores[i]}"
+                         for i in range(self.players))
+
+    def round_text(self):
+        match = self.match
+        labels = {"tie": "Tie!", "human": "You Win!", "ai": "AI Wins!"}
+        if self.players == 1:
+            return f"Round {match.round} Result: " + labels[match.round_result]
+        return f"Round {match.round}: " + "  ".join(
+            f"P{i + 1} {labels[result]}" for i, result in enumerate(match.round_results))
 
     def create_result_page(self):
         # Determine winner and play appropriate video
-        is_human_winner = self.human_score > self.ai_score
-        video = self.win_video if is_human_winner else self.lose_video
-        
-        result_frame = None
-        if video.isOpened():
-            ret, result_frame = video.read()
-            if ret:
-                result_frame = cv2.resize(result_frame, (1580, 920))
+        match = self.match
+        is_human_winner = match.winner() == "human"
+        video = self.videos.get('assets/win.mp4' if is_human_winner else 'assets/lose.mp4')
         
-        if result_frame is None:
+        if video is not None:
+            result_frame = self.result_buffer
+            np.copyto(result_frame, video.frame_at(self.now - self.result_started))
+        else:
             result_frame = self.bg_image.copy()
         
         # Add final score
@@ -113,158 +185,398 @@ class RockPaperScissors:
                     (500, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 4)
         cv2.putText(result_frame, f"Final Score:", 
                     (500, 200), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
-        cv2.putText(result_frame, f"Human: {self.human_score} - AI: {self.ai_score}", 
+        cv2.putText(result_frame, f"Human: {match.human_score} - AI: {match.ai_score}", 
                     (450, 250), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
         
         winner_text = "You Win!" if is_human_winner else "AI Wins!"
-        if self.human_score == self.ai_score:
+        if match.winner() == "tie":
             winner_text = "It's a Tie!"
         cv2.putText(result_frame, winner_text, 
                     (500, 350), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 4)
         
+        if self.players > 1:
+            for i in range(self.players):
+                cv2.putText(result_frame, f"P{i + 1}: {match.human_scores[i]} - AI: {match.ai_scores[i]}",
+                            (500, 430 + 45 * i), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
+        
         cv2.putText(result_frame, "Press 'R' to Play Again", 
                     (450, 650), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
         
         return result_frame
 
     def detect_gesture(self, frame):
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(frame_rgb)
+        detection = self.detector.detect(frame)
+        self.profiler.mark("inference")
+        self.detector.draw(frame, detection)
+        self.profiler.mark("draw")
+        return detection
+
+    def infer_frame(self, frame):
+        # Runs on the pipeline's inference worker; drawing is left to the
+        # render loop so the shared frame is never written to here
+        return self.detector.detect(frame)
+
+    def start_pipeline(self):
+        self.pipeline = FramePipeline(self.cap, self.infer_frame)
+        self.pipeline.start()
+
+    def stop_pipeline(self):
+        if self.pipeline:
+            self.pipeline.stop()
+            print("Pipeline stats:", self.pipeline.report())
+            self.pipeline = None
+
+    def on_match_state(self, state):
+        self.log_event("state", state=state)
+        if state == "playing":
+            self.playing_since = self.now
+            self.last_detection = None
+            for stabilizer in self.stabilizers:
+                stabilizer.reset()
+            self.locked_moves = [None] * self.players
+        elif state == "finished":
+            self.page = "result"
+            self.result_started = self.now
+        self.detector.set_active(state == "playing")
+        if self.pipeline:
+            self.pipeline.set_inference(state == "playing")
+
+    def read_camera_frame(self):
+        if self.pipeline:
+            packet = self.pipeline.latest_frame()
+            if packet is None:
+                return None
+            return packet[1]
         
-        if not results.multi_hand_landmarks:
+        ret, frame = self.cap.read()
+        if not ret:
             return None
-            
-        hand_landmarks = results.multi_hand_landmarks[0]
-        self.mp_draw.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
+        return cv2.flip(frame, 1)
+
+    def consume_detection(self, detection):
+        # Every detection that reaches the stabilizer is what gets recorded
+        self.frame_detection = detection
+        return self.stabilizer.update(detection.gesture, detection.score)
+
+    def next_gesture(self, frame):
+        if self.replay_detections:
+            detection = self.replay.detection(self.replay_row)
+            self.profiler.mark("inference")
+            return self.consume_detection(detection) if detection else None
         
-        # Get landmark positions for gesture detection
-        landmarks = []
-        for lm in hand_landmarks.landmark:
-            landmarks.append([lm.x, lm.y])
+        if not self.pipeline:
+            detection = self.detect_gesture(frame)
+            # Frames that reuse a cached result are not new evidence; voting
+            # on them would let one inference commit a move
+            if not detection.fresh:
+                return None
+            return self.consume_detection(detection)
         
-        # Detect gestures
-        if self.is_rock(landmarks):
-            return "rock"
-        elif self.is_paper(landmarks):
-            return "paper"
-        elif self.is_scissors(landmarks):
-            return "scissors"
+        result = self.pipeline.latest_result()
+        if result is not None:
+            timestamp, detection = result
+            # Ignore results for frames captured before this round started
+            if timestamp >= self.playing_since:
+                self.last_detection = detection
+                gesture = self.consume_detection(detection) if detection.fresh else None
+                if gesture:
+                    self.profiler.mark("inference")
+                    return gesture
+        self.profiler.mark("inference")
         return None
 
-    def is_rock(self, landmarks):
-        return (abs(landmarks[4][0] - landmarks[8][0]) < 0.1 and
-                abs(landmarks[4][1] - landmarks[8][1]) < 0.1)
+    def next_moves(self, frame):
+        # Multi-player: classify every hand at once, keep each hand in its
+        # player slot and lock a player's move once their frames agree.
+        # Returns all moves once every player has locked one.
+        detections, points = self.detector.detect_all(frame)
+        self.profiler.mark("inference")
+        slots = self.slots.assign(points)
+        
+        height, width = frame.shape[:2]
+        seen = [None] * self.players
+        for i, (detection, slot) in enumerate(zip(detections, slots)):
+            self.detector.draw(frame, detection)
+            if slot >= 0:
+                seen[slot] = detection
+            label = f"P{slot + 1}" if slot >= 0 else "spectator"
+            if slot >= 0 and self.locked_moves[slot]:
+                label += " ready"
+            wrist = (int(points[i, 0, 0] * width), int(points[i, 0, 1] * height) + 30)
+            cv2.putText(frame, label, wrist, cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+        
+        for slot, detection in enumerate(seen):
+            # Only frames where inference actually ran count as votes
+            if self.locked_moves[slot] is None and self.detector.fresh:
+                gesture, score = (detection.gesture, detection.score) if detection else (None, 0.0)
+                self.locked_moves[slot] = self.stabilizers[slot].update(gesture, score)
+        self.profiler.mark("draw")
+        
+        if all(self.locked_moves):
+            return list(self.locked_moves)
+        return None
 
-    def is_paper(self, landmarks):
-        return (landmarks[8][1] < landmarks[6][1] and
-                landmarks[12][1] < landmarks[10][1] and
-                landmarks[16][1] < landmarks[14][1] and
-                landmarks[20][1] < landmarks[18][1])
+    def draw_last_hand(self, frame):
+        if self.last_detection is None or self.last_detection.hand is None:
+            return frame
+        # The camera frame is shared with the inference worker
+        frame = frame.copy()
+        self.detector.draw(frame, self.last_detection)
+        self.profiler.mark("draw")
+        return frame
 
-    def is_scissors(self, landmarks):
-        return (landmarks[8][1] < landmarks[6][1] and
-                landmarks[12][1] < landmarks[10][1] and
-                landmarks[16][1] > landmarks[14][1] and
-                landmarks[20][1] > landmarks[18][1])
+    def draw_overlay(self, frame):
+        for i, line in enumerate(self.profiler.overlay_lines()):
+            self.compositor.put_text(frame, line, (20, 140 + 22 * i), 0.55, 1)
 
     def check_button_click(self, event, x, y, flags, param):
         if self.page == "start" and event == cv2.EVENT_LBUTTONDOWN:
             # Check if click is within start button bounds
             if 490 <= x <= 790 and 350 <= y <= 430:
-                self.page = "game"
-                self.game_state = "countdown"
-                self.countdown_timer = time.time()
+                self.now = time.time()
+                self.start_game()
+
+    def game_step(self, frame):
+        # One camera frame of the game page: advance the match, compose the
+        # output and record the frame's inputs
+        image = frame.copy() if self.recorder and self.recorder.jpeg_quality else None
+        self.frame_detection = None
+        
+        match = self.match
+        if match.state == "countdown":
+            self.detector.skip()
+            game_frame = self.create_game_page(frame, False)
+            time_left = match.tick()
+            
+            if time_left > 0:
+                self.compositor.put_text(game_frame, str(time_left), (600, 400), 4, 8)
+            frame = game_frame
+            
+        elif match.state == "playing" and self.players > 1:
+            moves = self.next_moves(frame)
+            game_frame = self.create_game_page(frame, False)
+            
+            if moves:
+                match.resolve_round(moves)
+                self.log_event("round", human=moves, ai=match.ai_move,
+                               result=match.round_results)
+            
+            frame = game_frame
+            
+        elif match.state == "playing":
+            gesture = self.next_gesture(frame)
+            if self.pipeline:
+                frame = self.draw_last_hand(frame)
+            game_frame = self.create_game_page(frame, False)
+            
+            if gesture:
+                match.resolve_round(gesture)
+                self.log_event("round", human=match.human_move, ai=match.ai_move,
+                               result=match.round_result)
+            
+            frame = game_frame
+            
+        elif match.state == "break":
+            self.detector.skip()
+            game_frame = self.create_game_page(frame, True)
+            time_left = match.tick()
+            
+            if time_left > 0:
+                self.compositor.put_text(game_frame, self.round_text(), (400, 360), 1.5, 3)
+            frame = game_frame
+        
+        if self.recorder:
+            self.recorder.add(self.now, match.state, self.frame_detection, image)
+        return frame
 
     def run(self):
         cv2.namedWindow('Rock Paper Scissors')
         cv2.setMouseCallback('Rock Paper Scissors', self.check_button_click)
         
+        if self.pipelined:
+            self.start_pipeline()
+        
         while True:
+            self.profiler.begin_frame()
+            self.now = time.time()
             if self.page == "start":
                 frame = self.create_start_page()
+                self.profiler.mark("compose")
                 
             elif self.page == "game":
-                ret, frame = self.cap.read()
-                if not ret:
+                frame = self.read_camera_frame()
+                if frame is None:
                     continue
+                self.profiler.mark("capture")
                 
-                frame = cv2.flip(frame, 1)
+                frame = self.game_step(frame)
                 
-                if self.game_state == "countdown":
-                    game_frame = self.create_game_page(frame, False)
-                    time_left = int(3 - (time.time() - self.countdown_timer))
-                    
-                    if time_left <= 0:
-                        self.game_state = "playing"
-                    else:
-                        cv2.putText(game_frame, str(time_left), 
-                                  (600, 400), cv2.FONT_HERSHEY_SIMPLEX, 4, (255, 255, 255), 8)
-                    frame = game_frame
-                    
-                elif self.game_state == "playing":
-                    gesture = self.detect_gesture(frame)
-                    game_frame = self.create_game_page(frame, False)
-                    
-                    if gesture:
-                        self.human_move = gesture
-                        self.ai_move = random.choice(['rock', 'paper', 'scissors'])
-                        
-                        # Determine winner
-                        if self.human_move == self.ai_move:
-                            self.round_result = "tie"
-                        elif ((self.human_move == "rock" and self.ai_move == "scissors") or
-                              (self.human_move == "paper" and self.ai_move == "rock") or
-                              (self.human_move == "scissors" and self.ai_move == "paper")):
-                            self.round_result = "human"
-                            self.human_score += 1
-                        else:
-                            self.round_result = "ai"
-                            self.ai_score += 1
-                        
-                        self.round += 1
-                        self.game_state = "break"
-                        self.break_timer = time.time()
-                    
-                    frame = game_frame
-                    
-                elif self.game_state == "break":
-                    game_frame = self.create_game_page(frame, True)
-                    time_left = int(2 - (time.time() - self.break_timer))
-                    
-                    if time_left <= 0:
-                        if self.round >= self.max_rounds:
-                            self.page = "result"
-                        else:
-                            self.game_state = "countdown"
-                            self.countdown_timer = time.time()
-                    else:
-                        result_text = f"Round {self.round} Result: "
-                        if self.round_result == "tie":
-                            result_text += "Tie!"
-                        elif self.round_result == "human":
-                            result_text += "You Win!"
-                        else:
-                            result_text += "AI Wins!"
-                        
-                        cv2.putText(game_frame, result_text, (400, 360),
-                                  cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
-                    frame = game_frame
+                if self.pipeline:
+                    self.compositor.put_text(frame, self.pipeline.status_text(), (20, 900), 0.6, 1)
+                if self.show_overlay:
+                    self.draw_overlay(frame)
+                self.profiler.mark("compose")
                     
             elif self.page == "result":
                 frame = self.create_result_page()
+                self.profiler.mark("compose")
                 
                 key = cv2.waitKey(1) & 0xFF
                 if key == ord('r'):
-                    self.__init__()
+                    self.reset_game()
                     
             cv2.imshow('Rock Paper Scissors', frame)
+            self.profiler.mark("display")
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            key = cv2.waitKey(1) & 0xFF
+            self.profiler.mark("waitkey")
+            self.profiler.end_frame()
+            if key == ord('q'):
                 break
+            elif key == ord('p'):
+                # Toggle the FPS overlay; this turns timing on if it was off
+                self.show_overlay = not self.show_overlay
+                self.profiler.enabled = self.profiler.enabled or self.show_overlay
                 
+        self.stop_pipeline()
+        print("Inference stats:", self.detector.report())
+        print("Capture stats:", self.cap.report())
+        if self.recorder:
+            self.recorder.close()
+            print(f"Recorded {self.recorder.rows} frames to {self.recorder.path} "
+                  f"({self.recorder.dropped_images} images dropped)")
+        if self.scores:
+            self.scores.close()
+        if self.profile_path:
+            self.profiler.dump_chrome_trace(self.profile_path)
+            print("Profile written to", self.profile_path)
         self.cap.release()
         cv2.destroyAllWindows()
 
+    def run_replay(self, display=False):
+        # Feeds a recorded session back through game_step on its recorded
+        # clock. Clicks and resets are re-applied before the frame they
+        # preceded, so the match replays the same transitions and rounds.
+        log = self.replay
+        inputs = {}
+        for event in log.events:
+            if event["kind"] in ("start", "reset"):
+                inputs.setdefault(event["frame"], []).append(event)
+        
+        start = time.perf_counter()
+        for row in range(log.rows + 1):
+            self.replay_row = row
+            for event in inputs.get(row, ()):
+                self.now = event["t"]
+                if event["kind"] == "start":
+                    self.start_game()
+                else:
+                    self.reset_game()
+            if row == log.rows:
+                break
+            
+            self.profiler.begin_frame()
+            self.now = float(log.t[row])
+            frame = log.frame(row)
+            self.profiler.mark("capture")
+            frame = self.game_step(frame)
+            self.profiler.mark("compose")
+            if display:
+                cv2.imshow('Rock Paper Scissors (replay)', frame)
+                cv2.waitKey(1)
+                self.profiler.mark("display")
+            self.profiler.end_frame()
+        elapsed = time.perf_counter() - start
+        
+        # Timestamps of events raised before the first frame differ between
+        # runs, so outcomes are compared by kind, frame and content only
+        def outcomes(events):
+            return [{key: value for key, value in event.items() if key != "t"}
+                    for event in events if event["kind"] in ("state", "round")]
+        recorded, replayed = outcomes(log.events), outcomes(self.replayed_events)
+        mismatch = next((i for i, (a, b) in enumerate(zip(recorded, replayed)) if a != b),
+                        None if len(recorded) == len(replayed) else min(len(recorded), len(replayed)))
+        
+        if display:
+            cv2.destroyAllWindows()
+        return {
+            "frames": log.rows,
+            "seconds": round(elapsed, 3),
+            "fps": round(log.rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "deterministic": mismatch is None,
+            "first_mismatch": None if mismatch is None else {
+                "recorded": recorded[mismatch] if mismatch < len(recorded) else None,
+                "replayed": replayed[mismatch] if mismatch < len(replayed) else None
+            },
+            "profile": self.profiler.summary()
+        }
+
 if __name__ == "__main__":
-    game = RockPaperScissors()
-    game.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Rock Paper Scissors")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="run capture and inference on background threads")
+    parser.add_argument("--infer-every", type=int, default=1,
+                        help="run hand inference on every Nth frame")
+    parser.add_argument("--detect-scale", type=float, default=0.5,
+                        help="frame scale used for full-frame hand detection")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="record per-stage timings and write a Chrome trace on exit")
+    parser.add_argument("--fps-overlay", action="store_true",
+                        help="show FPS and per-stage timings on screen (toggle with 'p')")
+    parser.add_argument("--stable-frames", type=int, default=3,
+                        help="frames that must agree before a move is committed")
+    parser.add_argument("--stable-window", type=int, default=5,
+                        help="number of recent frames considered for agreement")
+    parser.add_argument("--min-confidence", type=float, default=0.0,
+                        help="minimum mean handedness score of the agreeing frames")
+    parser.add_argument("--opponent", choices=list(STRATEGIES), default="ensemble",
+                        help="AI strategy")
+    parser.add_argument("--source", default="0",
+                        help="camera index, video file or stream URL")
+    parser.add_argument("--camera-fps", type=float,
+                        help="requested camera frame rate")
+    parser.add_argument("--classifier", metavar="MODEL",
+                        help="learned gesture model from classifier.py instead of the landmark rules")
+    parser.add_argument("--players", type=int, default=1,
+                        help="local players, each playing the AI with their own hand")
+    parser.add_argument("--max-hands", type=int,
+                        help="hands to track (extra hands beyond --players are spectators)")
+    parser.add_argument("--player", default="guest", help="name recorded with this player's scores")
+    parser.add_argument("--scores", default=DEFAULT_PATH, metavar="PATH",
+                        help="SQLite score history ('' to disable)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the session (clock, detections, events) to a binary log")
+    parser.add_argument("--record-frames", action="store_true",
+                        help="also store JPEG-compressed camera frames in the log")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="replay a recorded session headlessly and report whether it matched")
+    parser.add_argument("--replay-display", action="store_true",
+                        help="show frames while replaying")
+    parser.add_argument("--redetect", action="store_true",
+                        help="rerun hand detection on recorded frames instead of using recorded results")
+    args = parser.parse_args()
+    if args.players > 1 and (args.pipelined or args.record or args.replay):
+        parser.error("--players > 1 does not support --pipelined, --record or --replay")
+    
+    if args.replay:
+        log = read_session(args.replay)
+        meta = log.meta
+        game = RockPaperScissors(infer_every=meta.get("infer_every", 1),
+                                 detect_scale=meta.get("detect_scale", 0.5),
+                                 stable_frames=meta.get("stable_frames", 3),
+                                 stable_window=meta.get("stable_window", 5),
+                                 min_confidence=meta.get("min_confidence", 0.0),
+                                 classifier_path=meta.get("classifier"),
+                                 replay=log, redetect=args.redetect)
+        print(json.dumps(game.run_replay(args.replay_display), indent=2))
+    else:
+        game = RockPaperScissors(pipelined=args.pipelined, infer_every=args.infer_every,
+                                 detect_scale=args.detect_scale, profile_path=args.profile,
+                                 show_overlay=args.fps_overlay, stable_frames=args.stable_frames,
+                                 stable_window=args.stable_window, min_confidence=args.min_confidence,
+                                 opponent=args.opponent, record_path=args.record,
+                                 record_frames=args.record_frames, scores_path=args.scores,
+                                 player=args.player, players=args.players,
+                                 max_hands=args.max_hands, source=args.source,
+                                 camera_fps=args.camera_fps, classifier_path=args.classifier)
+        game.run()
\ No newline at end of file
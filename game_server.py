@@ -0,0 +1,285 @@
+import argparse
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from engine import MediaPipeDetector
+
+class AdmissionError(RuntimeError):
+    pass
+
+class PlayerSession:
+    def __init__(self, session_id, queue_size):
+        self.session_id = session_id
+        self.frames = deque(maxlen=queue_size)
+        self.queued = False
+        # Frames are numbered at submit; a result is kept only if its frame
+        # is newer than the stored result and than the last reset
+        self.result = None  # (seq, gesture, latency)
+        self.seq = 0
+        self.taken_seq = 0
+        self.reset_seq = 0
+        self.last_seen = time.time()
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.latencies = deque(maxlen=4096)
+
+class GameServer:
+    # Routes frames from many player sessions to a fixed pool of inference
+    # threads, each with its own MediaPipe Hands. Sessions are served
+    # round-robin so one busy player cannot starve the others; each session
+    # keeps at most `session_queue` frames (oldest dropped) and submits are
+    # refused once `max_pending` frames are waiting server-wide.
+    def __init__(self, workers=4, max_sessions=32, session_queue=2, max_pending=64,
+                 idle_timeout=30.0, detector_config=None):
+        self.workers = workers
+        self.max_sessions = max_sessions
+        self.session_queue = session_queue
+        self.max_pending = max_pending
+        self.idle_timeout = idle_timeout
+        # Frames from different players share a graph, so tracking between
+        # frames is disabled and every frame is detected independently
+        self.detector_config = detector_config or {
+            "static_image_mode": True,
+            "detect_scale": 1.0,
+            "roi_tracking": False
+        }
+
+        self.sessions = {}
+        self.ready = deque()
+        self.pending = 0
+        self.rejected = 0
+        self.ids = itertools.count(1)
+        self.cond = threading.Condition()
+        self.running = False
+        self.threads = []
+
+    def start(self):
+        self.running = True
+        self.threads = [threading.Thread(target=self._worker_loop, daemon=True)
+                        for _ in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=2.0)
+        self.threads = []
+
+    def open_session(self):
+        with self.cond:
+            if len(self.sessions) >= self.max_sessions:
+                self._evict_idle()
+            if len(self.sessions) >= self.max_sessions:
+                raise AdmissionError(f"server full ({self.max_sessions} sessions)")
+            session_id = next(self.ids)
+            self.sessions[session_id] = PlayerSession(session_id, self.session_queue)
+            return session_id
+
+    def close_session(self, session_id):
+        with self.cond:
+            session = self.sessions.pop(session_id, None)
+            if session:
+                self._drop_frames(session)
+
+    def _evict_idle(self):
+        now = time.time()
+        for session_id, session in list(self.sessions.items()):
+            if now - session.last_seen > self.idle_timeout:
+                self._drop_frames(self.sessions.pop(session_id))
+
+    def _drop_frames(self, session):
+        # A closed session may still sit in the ready queue; workers skip it
+        self.pending -= len(session.frames)
+        session.frames.clear()
+
+    def submit(self, session_id, frame):
+        # Returns False when the frame was refused because the server is saturated
+        with self.cond:
+            session = self.sessions.get(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            session.last_seen = time.time()
+
+            full = len(session.frames) == session.frames.maxlen
+            if not full and self.pending >= self.max_pending:
+                self.rejected += 1
+                return False
+            if full:
+                session.dropped += 1
+            else:
+                self.pending += 1
+
+            session.seq += 1
+            session.frames.append((session.seq, time.time(), frame))
+            session.submitted += 1
+            if not session.queued:
+                session.queued = True
+                self.ready.append(session)
+            self.cond.notify()
+            return True
+
+    def reset_session(self, session_id):
+        # Forget queued frames and any unread result, e.g. when a new round
+        # starts; frames already being processed are discarded when done
+        with self.cond:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return
+            self._drop_frames(session)
+            session.result = None
+            session.reset_seq = session.taken_seq = session.seq
+
+    def take_result(self, session_id):
+        # Newest gesture not yet returned to this session, or None
+        with self.cond:
+            session = self.sessions.get(session_id)
+            if session is None or session.result is None or session.result[0] == session.taken_seq:
+                return None
+            session.taken_seq = session.result[0]
+            return session.result[1]
+
+    def detect(self, session_id, frame):
+        # Non-blocking detection for frame callbacks: queue this frame and
+        # return the freshest finished result (usually from a frame before)
+        self.submit(session_id, frame)
+        return self.take_result(session_id)
+
+    def _next_job(self):
+        with self.cond:
+            while self.running:
+                if not self.ready:
+                    self.cond.wait(0.1)
+                    continue
+                session = self.ready.popleft()
+                if not session.frames:
+                    session.queued = False
+                    continue
+                seq, submitted, frame = session.frames.popleft()
+                self.pending -= 1
+                # Round-robin: a session with more frames goes to the back
+                if session.frames:
+                    self.ready.append(session)
+                else:
+                    session.queued = False
+                return session, seq, submitted, frame
+            return None
+
+    def _worker_loop(self):
+        detector = MediaPipeDetector(**self.detector_config)
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            session, seq, submitted, frame = job
+
+            detection = detector.detect(frame)
+
+            latency = time.time() - submitted
+            with self.cond:
+                session.completed += 1
+                session.latencies.append(latency)
+                # With several workers an older frame can finish last
+                newest = session.result[0] if session.result else session.reset_seq
+                # Skipped frames (every_n > 1) only repeat an older result
+                if seq > newest and detection.fresh:
+                    session.result = (seq, detection.gesture, latency)
+        detector.close()
+
+    def stats(self):
+        with self.cond:
+            latencies = [lat for s in self.sessions.values() for lat in s.latencies]
+            return {
+                "sessions": len(self.sessions),
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "submitted": sum(s.submitted for s in self.sessions.values()),
+                "completed": sum(s.completed for s in self.sessions.values()),
+                "dropped": sum(s.dropped for s in self.sessions.values()),
+                "latency_ms": percentiles_ms(latencies)
+            }
+
+def percentiles_ms(latencies):
+    if not latencies:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    ms = np.asarray(latencies) * 1000
+    return {f"p{p}": round(float(np.percentile(ms, p)), 2) for p in (50, 95, 99)}
+
+def simulate_player(server, frames, fps, duration, per_player):
+    try:
+        session_id = server.open_session()
+    except AdmissionError:
+        per_player.append(None)
+        return
+
+    interval = 1.0 / fps
+    start = time.time()
+    index = 0
+    while time.time() - start < duration:
+        server.submit(session_id, frames[index % len(frames)])
+        server.take_result(session_id)
+        index += 1
+        # Pace like a camera; catch up rather than drift when late
+        time.sleep(max(0.0, start + index * interval - time.time()))
+
+    session = server.sessions[session_id]
+    per_player.append({
+        "submitted": session.submitted,
+        "completed": session.completed,
+        "dropped": session.dropped,
+        "latency_ms": percentiles_ms(list(session.latencies))
+    })
+
+def main():
+    from benchmark import recorded_frames, synthetic_frames
+
+    parser = argparse.ArgumentParser(description="Load test the shared inference pool with simulated players")
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--fps", type=float, default=15.0, help="frames per second sent by each player")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--frames", help="video file or image directory to replay (default: synthetic)")
+    parser.add_argument("--max-sessions", type=int, default=32)
+    parser.add_argument("--max-pending", type=int, default=64)
+    args = parser.parse_args()
+
+    frames = recorded_frames(args.frames, 120) if args.frames else synthetic_frames(30)
+    server = GameServer(workers=args.workers, max_sessions=args.max_sessions,
+                        max_pending=args.max_pending).start()
+
+    per_player = []
+    players = [threading.Thread(target=simulate_player,
+                                args=(server, frames, args.fps, args.duration, per_player))
+               for _ in range(args.players)]
+    start = time.time()
+    for player in players:
+        player.start()
+    for player in players:
+        player.join()
+    elapsed = time.time() - start
+
+    stats = server.stats()
+    server.stop()
+    admitted = [p for p in per_player if p is not None]
+    report = {
+        "players": args.players,
+        "admitted": len(admitted),
+        "workers": args.workers,
+        "seconds": round(elapsed, 2),
+        "throughput_fps": round(stats["completed"] / elapsed, 1),
+        "server": stats,
+        "per_player_completed": [p["completed"] for p in admitted]
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import numpy as np
+
+# Gesture labels and their integer codes in batch results
+GESTURES = ("rock", "paper", "scissors")
+NO_GESTURE = -1
+GESTURE_CODES = {gesture: code for code, gesture in enumerate(GESTURES)}
+
+NUM_LANDMARKS = 21
+THUMB_TIP = 4
+INDEX_TIP = 8
+
+# Knuckle (MCP), middle joint (PIP) and tip of each finger (index,
+# middle, ring, pinky)
+FINGER_MCPS = np.array([5, 9, 13, 17])
+FINGER_PIPS = np.array([6, 10, 14, 18])
+FINGER_TIPS = np.array([8, 12, 16, 20])
+
+# Thumb tip and index tip closer than this on both axes counts as rock
+ROCK_DISTANCE = 0.1
+
+class LandmarkBuffer:
+    # Preallocated (21, 3) array that MediaPipe landmarks are copied into
+    def __init__(self):
+        self.array = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+        self.flat = self.array.reshape(-1)
+
+    def fill(self, hand_landmarks):
+        flat = self.flat
+        for i, lm in enumerate(hand_landmarks.landmark):
+            flat[3 * i] = lm.x
+            flat[3 * i + 1] = lm.y
+            flat[3 * i + 2] = lm.z
+        return self.array
+
+class LandmarkBatch:
+    # Preallocated (max_hands, 21, 3) array for every hand in one frame
+    def __init__(self, max_hands):
+        self.array = np.zeros((max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.flat = self.array.reshape(max_hands, -1)
+
+    def fill(self, hands):
+        count = min(len(hands), len(self.array))
+        for h in range(count):
+            flat = self.flat[h]
+            for i, lm in enumerate(hands[h].landmark):
+                flat[3 * i] = lm.x
+                flat[3 * i + 1] = lm.y
+                flat[3 * i + 2] = lm.z
+        return self.array[:count]
+
+def as_batch(points):
+    points = np.asarray(points, dtype=np.float32)
+    if points.ndim == 2:
+        points = points[np.newaxis]
+    return points
+
+def fingertip_gap(points):
+    # Per-axis thumb-tip to index-tip distance, shape (N, 2). Computed in
+    # float64 so threshold checks match the original Python-float rules.
+    thumb = points[:, THUMB_TIP, :2].astype(np.float64)
+    index = points[:, INDEX_TIP, :2].astype(np.float64)
+    return np.abs(thumb - index)
+
+def fingers_extended(points):
+    # (N, 4) booleans: fingertip above its PIP joint in image coordinates
+    return points[:, FINGER_TIPS, 1] < points[:, FINGER_PIPS, 1]
+
+def fingers_folded(points):
+    return points[:, FINGER_TIPS, 1] > points[:, FINGER_PIPS, 1]
+
+def joint_angles(points):
+    # (N, 4) bend angle in radians at each finger's PIP joint, 0 = straight.
+    # Not used by the rules (which keep the original labels); the learned
+    # classifier takes them as features.
+    base = points[:, FINGER_PIPS, :2] - points[:, FINGER_MCPS, :2]
+    tip = points[:, FINGER_TIPS, :2] - points[:, FINGER_PIPS, :2]
+    dot = (base * tip).sum(axis=-1)
+    norms = np.linalg.norm(base, axis=-1) * np.linalg.norm(tip, axis=-1)
+    return np.arccos(np.clip(dot / np.maximum(norms, 1e-9), -1.0, 1.0))
+
+def classify_batch(points):
+    # Label codes for landmarks of shape (N, 21, 2+) or (21, 2+).
+    # Rules match the original is_rock / is_paper / is_scissors checks,
+    # applied in the same priority order.
+    points = as_batch(points)
+    gap = fingertip_gap(points)
+    extended = fingers_extended(points)
+    folded = fingers_folded(points)
+
+    rock = (gap < ROCK_DISTANCE).all(axis=1)
+    paper = extended.all(axis=1)
+    scissors = extended[:, 0] & extended[:, 1] & folded[:, 2] & folded[:, 3]
+
+    codes = np.full(points.shape[0], NO_GESTURE, dtype=np.int8)
+    codes[scissors] = 2
+    codes[paper] = 1
+    codes[rock] = 0
+    return codes
+
+def classify(points):
+    code = classify_batch(points)[0]
+    if code == NO_GESTURE:
+        return None
+    return GESTURES[code]
+
+def labels(codes):
+    return [GESTURES[code] if code != NO_GESTURE else None for code in codes]
+
+class GestureStabilizer:
+    # Commits a gesture only once `required` of the last `window` frames
+    # agree and their mean confidence (e.g. MediaPipe handedness score)
+    # reaches min_confidence. Vote counts are kept incrementally in
+    # preallocated arrays, so each update is constant time.
+    def __init__(self, window=5, required=3, min_confidence=0.0):
+        self.window = window
+        self.required = required
+        self.min_confidence = min_confidence
+        self.codes = np.full(window, NO_GESTURE, dtype=np.int8)
+        self.scores = np.zeros(window, dtype=np.float64)
+        self.counts = np.zeros(len(GESTURES), dtype=np.int32)
+        self.totals = np.zeros(len(GESTURES), dtype=np.float64)
+        self.index = 0
+
+    def reset(self):
+        self.codes.fill(NO_GESTURE)
+        self.scores.fill(0.0)
+        self.counts.fill(0)
+        self.totals.fill(0.0)
+        self.index = 0
+
+    def update(self, gesture, score=1.0):
+        i = self.index
+        old = self.codes[i]
+        if old != NO_GESTURE:
+            self.counts[old] -= 1
+            self.totals[old] -= self.scores[i]
+
+        code = GESTURE_CODES[gesture] if gesture else NO_GESTURE
+        self.codes[i] = code
+        self.scores[i] = score
+        self.index = (i + 1) % self.window
+        if code == NO_GESTURE:
+            return None
+
+        self.counts[code] += 1
+        self.totals[code] += score
+        count = self.counts[code]
+        if count >= self.required and self.totals[code] >= self.min_confidence * count:
+            return gesture
+        return None
@@ -0,0 +1,136 @@
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+import gestures
+from capture import InputManager
+from engine import Match
+from game_server import GameServer
+from opponents import STRATEGIES, make_opponent
+
+class HostedMatch:
+    # One match per source, played against its own AI with gestures from
+    # the shared inference pool
+    def __init__(self, manager, name, opponent, stable_frames=3, stable_window=5, restart_after=5.0):
+        self.manager = manager
+        self.name = name
+        self.restart_after = restart_after
+        self.stabilizer = gestures.GestureStabilizer(stable_window, stable_frames)
+        self.match = Match(max_rounds=3, opponent=make_opponent(opponent), on_state=self.on_state)
+        self.frame = None
+        self.matches_played = 0
+        self.results = {"human": 0, "ai": 0, "tie": 0}
+
+    def on_state(self, state):
+        if state == "playing":
+            self.stabilizer.reset()
+            self.manager.reset_results(self.name)
+        elif state == "finished":
+            self.matches_played += 1
+            self.results[self.match.winner()] += 1
+        self.manager.set_inference(self.name, state == "playing")
+
+    def step(self, now):
+        packet = self.manager.sources[self.name].latest()
+        if packet is not None:
+            self.frame = packet[1]
+
+        match = self.match
+        if match.state == "playing":
+            # No new result and no hand both come back as None; only
+            # frames with a hand are voted on
+            gesture = self.manager.take_result(self.name)
+            move = self.stabilizer.update(gesture) if gesture else None
+            if move:
+                match.resolve_round(move)
+        elif match.finished:
+            if now - match.state_started >= self.restart_after:
+                match.reset()
+        else:
+            match.tick(now)
+
+    def status(self):
+        match = self.match
+        line = f"{match.state} round {match.round}/{match.max_rounds}  {match.human_score}-{match.ai_score}"
+        if match.state == "break":
+            line += f"  {match.human_move} vs {match.ai_move}"
+        elif match.finished:
+            line += f"  winner: {match.winner()}"
+        return line
+
+def draw_tile(hosted, capture, tile_size):
+    width, height = tile_size
+    if hosted.frame is None:
+        tile = np.zeros((height, width, 3), dtype=np.uint8)
+    else:
+        tile = cv2.resize(cv2.flip(hosted.frame, 1), tile_size, interpolation=cv2.INTER_AREA)
+    report = capture.report()
+    lines = (hosted.name,
+             hosted.status(),
+             f"{report['capture_fps']:.0f} fps  dropped {report['dropped']}  missed {report['missed']}")
+    for i, line in enumerate(lines):
+        cv2.putText(tile, line, (8, 22 + 22 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 255, 255), 1)
+    return tile
+
+def mosaic(tiles, columns):
+    blank = np.zeros_like(tiles[0])
+    rows = [tiles[i:i + columns] for i in range(0, len(tiles), columns)]
+    rows[-1] = rows[-1] + [blank] * (columns - len(rows[-1]))
+    return np.vstack([np.hstack(row) for row in rows])
+
+def main():
+    parser = argparse.ArgumentParser(description="Host one match per camera, video file or stream")
+    parser.add_argument("sources", nargs="+",
+                        help="camera index, video file or stream URL (rtsp://, http://, ...)")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=float, help="requested camera frame rate")
+    parser.add_argument("--no-mjpg", action="store_true", help="keep the camera's default pixel format")
+    parser.add_argument("--buffer-size", type=int, default=1, help="driver frame buffer (1 = lowest latency)")
+    parser.add_argument("--workers", type=int, default=2, help="shared inference threads")
+    parser.add_argument("--opponent", choices=list(STRATEGIES), default="ensemble")
+    parser.add_argument("--stable-frames", type=int, default=3)
+    parser.add_argument("--stable-window", type=int, default=5)
+    parser.add_argument("--headless", action="store_true", help="run without a window")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--tile-width", type=int, default=480)
+    args = parser.parse_args()
+
+    server = GameServer(workers=args.workers, max_sessions=len(args.sources)).start()
+    manager = InputManager(args.sources, server=server, width=args.width, height=args.height,
+                           fps=args.fps, mjpg=not args.no_mjpg, buffer_size=args.buffer_size)
+    hosted = [HostedMatch(manager, name, args.opponent, args.stable_frames, args.stable_window)
+              for name in manager.sources]
+    manager.start()
+
+    tile_size = (args.tile_width, args.tile_width * 3 // 4)
+    columns = int(np.ceil(np.sqrt(len(hosted))))
+    start = time.time()
+    try:
+        while args.duration is None or time.time() - start < args.duration:
+            now = time.time()
+            for game in hosted:
+                game.step(now)
+            if args.headless:
+                time.sleep(0.01)
+                continue
+            tiles = [draw_tile(game, manager.sources[game.name], tile_size) for game in hosted]
+            cv2.imshow("Rock Paper Scissors tournament", mosaic(tiles, columns))
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    except KeyboardInterrupt:
+        pass
+
+    report = manager.report()
+    report["matches"] = {game.name: dict(game.results, played=game.matches_played) for game in hosted}
+    manager.stop()
+    server.stop()
+    if not args.headless:
+        cv2.destroyAllWindows()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
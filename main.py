@@ -1,42 +1,215 @@
+import time
+STARTED = time.perf_counter()
+
+import os
+# Must be set before anything pulls TensorFlow in (mediapipe may)
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+
 import cv2
 import numpy as np
 import tkinter as tk
 from tkinter import ttk
-import random
-from cvzone.HandTrackingModule import HandDetector
 import threading
-import os
+import sys
 import logging
+import argparse
+from collections import Counter, deque
+from contextlib import contextmanager
 from PIL import Image, ImageTk
-import tensorflow as tf
+from capture import CaptureSource
+from classifier import load_model
+from engine import CvzoneDetector, Match
+from opponents import make_opponent
+from score_store import MatchHistory, ScoreStore
 
-os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
-os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
-tf.get_logger().setLevel(logging.ERROR)
+CAMERA_REFRESH_MS = 16  # Tk preview refresh, ~60 Hz
+PREVIEW_SIZE = (400, 300)
+OPPONENT = "ensemble"
+WARMUP_POLL_MS = 50
+
+class StartupReport:
+    # Duration of each import/initialization phase and when it finished,
+    # measured from process start. Phases may run on the warm-up thread.
+    def __init__(self, started=STARTED):
+        self.started = started
+        self.phases = []
+        self.lock = threading.Lock()
+
+    def add(self, name, begin, end):
+        with self.lock:
+            self.phases.append((name, end - begin, end - self.started))
+
+    @contextmanager
+    def phase(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, begin, time.perf_counter())
+
+    def summary(self):
+        with self.lock:
+            phases = sorted(self.phases, key=lambda phase: phase[2])
+        lines = ["startup phases (ms, finished at ms):"]
+        for name, duration, finished in phases:
+            lines.append(f"  {name:22s} {duration * 1000:8.1f}  {finished * 1000:8.1f}")
+        return "\n".join(lines)
+
+startup = StartupReport()
+startup.add("imports", STARTED, time.perf_counter())
+
+class GestureVotes:
+    # Gestures from the last `size` inferred camera frames. Rounds resolve
+    # from their consensus rather than from a fresh single-frame read. The
+    # vote counts frames, not seconds, so a slow machine still gets a
+    # result; until `min_votes` frames exist, all of them must agree.
+    def __init__(self, size=5, min_votes=3):
+        self.votes = deque(maxlen=size)
+        self.min_votes = min_votes
+        self.lock = threading.Lock()
+
+    def add(self, choice):
+        with self.lock:
+            self.votes.append(choice)
+
+    def clear(self):
+        with self.lock:
+            self.votes.clear()
+
+    def consensus(self):
+        with self.lock:
+            recent = list(self.votes)
+        
+        counts = Counter(choice for choice in recent if choice)
+        if not counts:
+            return None
+        choice, votes = counts.most_common(1)[0]
+        # Needs enough agreeing frames and a majority of the recent frames
+        if votes >= min(self.min_votes, len(recent)) and votes * 2 > len(recent):
+            return choice
+        return None
+
+class CameraWorker:
+    # Reads the camera and runs hand detection off the Tk thread. The UI
+    # only picks up the newest published result, so a slow read or
+    # inference never blocks Tk callbacks.
+    #
+    # Previews go into three preallocated RGBA buffers: one holds the newest
+    # published frame, one may be being pasted by Tk, and the worker fills
+    # the third, so nothing is allocated per frame. RGBA rather than RGB
+    # lets PIL wrap each buffer without copying it.
+    def __init__(self, cap, detector, votes, preview_size=PREVIEW_SIZE):
+        self.cap = cap
+        self.detector = detector
+        self.votes = votes
+        self.preview_size = preview_size
+        width, height = preview_size
+        self.resized = np.empty((height, width, 3), dtype=np.uint8)
+        self.buffers = [np.empty((height, width, 4), dtype=np.uint8) for _ in range(3)]
+        self.images = [Image.frombuffer("RGBA", preview_size, buffer, "raw", "RGBA", 0, 1)
+                       for buffer in self.buffers]
+        self.lock = threading.Lock()
+        self.latest = None  # buffer index of the newest preview
+        self.reading = None  # buffer index Tk is pasting from
+        self.frame_id = 0
+        self.preview_enabled = True
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def _run(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+                
+            # cvzone draws the detected hand onto the frame
+            detection = self.detector.detect(frame)
+            self.votes.add(detection.gesture)
+                
+            if not self.preview_enabled:
+                continue
+            index = self._free_buffer()
+            # Shrink before converting so the colour pass touches fewer pixels
+            cv2.resize(frame, self.preview_size, dst=self.resized)
+            cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGBA, dst=self.buffers[index])
+            with self.lock:
+                self.frame_id += 1
+                self.latest = index
+
+    def _free_buffer(self):
+        # Only this thread changes `latest`, and Tk only claims `latest`
+        with self.lock:
+            busy = (self.latest, self.reading)
+        return next(i for i in range(len(self.buffers)) if i not in busy)
+
+    def set_preview(self, enabled):
+        # Detection keeps running; only the preview conversion is skipped
+        self.preview_enabled = enabled
+
+    def acquire_latest(self, shown_id):
+        # (frame_id, image) when there is a frame newer than shown_id; its
+        # buffer is not reused until release()
+        with self.lock:
+            if self.latest is None or self.frame_id == shown_id:
+                return None
+            self.reading = self.latest
+            return self.frame_id, self.images[self.latest]
+
+    def release(self):
+        with self.lock:
+            self.reading = None
 
 class RockPaperScissors:
-    def __init__(self):
-        self.root = tk.Tk()
-        self.root.title("Rock Paper Scissors")
-        self.root.geometry("1000x800")
-        self.root.configure(bg='#2C3E50')
+    def __init__(self, classifier_path=None):
+        # Optional learned gesture model used instead of the finger-count rule
+        self.classifier_path = classifier_path
+        with startup.phase("tk window"):
+            self.root = tk.Tk()
+            self.root.title("Rock Paper Scissors")
+            self.root.geometry("1000x800")
+            self.root.configure(bg='#2C3E50')
         
         # Initialize variables
         self.game_active = False
         self.camera_active = False
-        self.player_score = 0
-        self.ai_score = 0
         self.countdown = 3
-        self.round_number = 0  # Add round counter
-        self.max_rounds = 5    # Set maximum rounds
-        self.detector = HandDetector(maxHands=1)
+        # Rounds and scores; Tk callbacks drive the timing
+        # Round and match history, written off the Tk thread
+        self.scores = ScoreStore()
+        self.history = MatchHistory(self.scores, frontend="tk")
+        self.match = Match(max_rounds=5, opponent=make_opponent(OPPONENT),
+                           on_round=self.history.round_played)
+        # Built by the warm-up thread so the welcome screen shows at once
+        self.detector = None
+        self.cap = None
+        self.warmup_error = None
+        self.warmup_done = threading.Event()
+        self.camera_worker = None
+        self.shown_frame_id = 0
+        self.gesture_votes = GestureVotes()
         
         # Replace the choices dictionary with image paths
-        self.choices = {
-            "rock": self.load_image("assets/rock.png", (100, 100)),
-            "paper": self.load_image("assets/paper.png", (100, 100)),
-            "scissors": self.load_image("assets/scissors.png", (100, 100))
-        }
+        with startup.phase("assets"):
+            self.choices = {
+                "rock": self.load_image("assets/rock.png", (100, 100)),
+                "paper": self.load_image("assets/paper.png", (100, 100)),
+                "scissors": self.load_image("assets/scissors.png", (100, 100))
+            }
         
         # Configure styles
         self.style = ttk.Style()
@@ -48,7 +221,42 @@ class RockPaperScissors:
                            padding=10,
                            font=('Arial', 12, 'bold'))
         
-        self.create_welcome_screen()
+        with startup.phase("welcome screen"):
+            self.create_welcome_screen()
+        self.root.after_idle(lambda: startup.add("first paint", STARTED, time.perf_counter()))
+        self.start_warm_up()
+
+    def start_warm_up(self):
+        self.warmup_error = None
+        self.warmup_done.clear()
+        threading.Thread(target=self.warm_up, daemon=True).start()
+        
+    def warm_up(self):
+        # Heavy imports, the hand model and the camera load while the
+        # player is still on the welcome screen
+        try:
+            with startup.phase("import cvzone"):
+                # Pulls in mediapipe; timed apart from building the model
+                import cvzone.HandTrackingModule
+            if "tensorflow" in sys.modules:
+                # Only quieten TensorFlow if something already loaded it
+                sys.modules["tensorflow"].get_logger().setLevel(logging.ERROR)
+            with startup.phase("hand detector"):
+                classifier = load_model(self.classifier_path) if self.classifier_path else None
+                detector = CvzoneDetector(max_hands=1, classifier=classifier)
+            with startup.phase("camera open"):
+                if self.cap:
+                    # Left open by a warm-up that failed after this step
+                    self.cap.release()
+                self.cap = CaptureSource(0).start()
+            with startup.phase("first inference"):
+                detector.detect(np.zeros((480, 640, 3), dtype=np.uint8))
+            self.detector = detector
+        except Exception as e:
+            self.warmup_error = e
+        finally:
+            self.warmup_done.set()
+            print(startup.summary())
         
     def load_image(self, path, size):
         img = Image.open(path)
@@ -93,6 +301,13 @@ class RockPaperScissors:
                                style='Game.TLabel')
         instructions.pack(pady=30)
         
+        # Player name for the score history
+        name_frame = ttk.Frame(self.welcome_frame, style='Game.TFrame')
+        name_frame.pack()
+        ttk.Label(name_frame, text="Name:", font=("Arial", 14), style='Game.TLabel').pack(side=tk.LEFT, padx=10)
+        self.player_name = tk.StringVar(value=self.history.player)
+        tk.Entry(name_frame, textvariable=self.player_name, font=("Arial", 14), width=16).pack(side=tk.LEFT)
+        
         # Start button
         self.start_btn = tk.Button(self.welcome_frame,
                                  text="START GAME",
@@ -105,6 +320,12 @@ class RockPaperScissors:
                                  command=self.start_game)
         self.start_btn.pack(pady=20)
         
+        # Warm-up errors (e.g. no camera) are shown here
+        self.warmup_label = ttk.Label(self.welcome_frame, text="", font=("Arial", 12),
+                                      style='Game.TLabel', foreground='#E74C3C',
+                                      wraplength=800, justify=tk.CENTER)
+        self.warmup_label.pack(pady=5)
+        
         # Bind hover effects
         self.start_btn.bind('<Enter>', lambda e: self.start_btn.configure(bg='#2ECC71'))
         self.start_btn.bind('<Leave>', lambda e: self.start_btn.configure(bg='#27AE60'))
@@ -143,7 +364,9 @@ class RockPaperScissors:
                                style='Game.TLabel')
         player_label.pack(pady=10)
         
-        self.camera_label = ttk.Label(player_frame)
+        # One Tk image for the whole game, updated in place each frame
+        self.camera_photo = ImageTk.PhotoImage("RGBA", PREVIEW_SIZE)
+        self.camera_label = ttk.Label(player_frame, image=self.camera_photo)
         self.camera_label.pack()
         
         # VS label
@@ -200,42 +423,42 @@ class RockPaperScissors:
         self.quit_btn.pack(side=tk.LEFT, padx=10)
 
     def start_game(self):
+        # Wait for the warm-up without blocking Tk
+        if not self.warmup_done.is_set():
+            self.start_btn.configure(text="LOADING...", state=tk.DISABLED)
+            self.root.after(WARMUP_POLL_MS, self.start_game)
+            return
+        if self.warmup_error:
+            # Show the failure instead of raising inside a Tk callback, and
+            # retry the warm-up when the button is pressed again
+            self.warmup_label.configure(
+                text=f"Could not start: {self.warmup_error}. Check the camera and press START to retry.")
+            self.start_btn.configure(text="START GAME", state=tk.NORMAL)
+            self.start_warm_up()
+            return
+        self.warmup_label.configure(text="")
+
+        self.history.player = self.player_name.get().strip() or "guest"
         self.welcome_frame.destroy()
         self.create_game_screen()
         self.camera_active = True
         self.game_active = True
-        self.cap = cv2.VideoCapture(0)
+        self.camera_worker = CameraWorker(self.cap, self.detector, self.gesture_votes)
+        self.camera_worker.start()
         self.update_camera()
         self.start_round()
         
     def update_camera(self):
         if self.camera_active:
-            ret, frame = self.cap.read()
-            if ret:
-                hands, frame = self.detector.findHands(frame)
-                
-                if hands:
-                    fingers = self.detector.fingersUp(hands[0])
-                    player_choice = self.get_player_choice(fingers)
-                    
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame = cv2.resize(frame, (400, 300))
-                img = Image.fromarray(frame)
-                imgtk = ImageTk.PhotoImage(image=img)
-                self.camera_label.imgtk = imgtk
-                self.camera_label.configure(image=imgtk)
+            # Only blit; capture and detection run on the camera worker
+            latest = self.camera_worker.acquire_latest(self.shown_frame_id)
+            if latest:
+                self.shown_frame_id, image = latest
+                self.camera_photo.paste(image)
+                self.camera_worker.release()
             
-            self.root.after(10, self.update_camera)
+            self.root.after(CAMERA_REFRESH_MS, self.update_camera)
             
-    def get_player_choice(self, fingers):
-        if sum(fingers) == 0:
-            return "rock"
-        elif sum(fingers) == 5:
-            return "paper"
-        elif sum(fingers) == 2 and fingers[1] and fingers[2]:
-            return "scissors"
-        return None
-        
     def start_round(self):
         if self.game_active:
             self.countdown = 3
@@ -250,48 +473,35 @@ class RockPaperScissors:
             self.play_round()
             
     def play_round(self):
-        if self.round_number >= self.max_rounds:
+        if self.match.round >= self.match.max_rounds:
             self.show_final_results()
             return
 
-        ai_choice = random.choice(list(self.choices.keys()))
+        ai_choice = self.match.choose_ai_move()
         self.ai_choice_label.configure(image=self.choices[ai_choice])
         
-        ret, frame = self.cap.read()
-        hands, _ = self.detector.findHands(frame)
+        # Resolve from gestures already inferred by the camera worker
+        player_choice = self.gesture_votes.consensus()
         
-        if hands:
-            fingers = self.detector.fingersUp(hands[0])
-            player_choice = self.get_player_choice(fingers)
-            
-            if player_choice:
-                self.determine_winner(player_choice, ai_choice)
-                self.round_number += 1  # Increment round counter
-                self.show_break_screen()
-                return
+        if player_choice:
+            self.gesture_votes.clear()
+            self.determine_winner(player_choice, ai_choice)
+            self.show_break_screen()
+            return
         
         # If no valid choice was made, restart the round
         self.start_round()
         
     def determine_winner(self, player_choice, ai_choice):
-        if player_choice == ai_choice:
+        # Scores and the round counter are kept by the shared match engine
+        round_result = self.match.resolve_round(player_choice, ai_choice)
+        if round_result == "tie":
             return
         
-        winning_combinations = {
-            "rock": "scissors",
-            "paper": "rock",
-            "scissors": "paper"
-        }
-        
-        if winning_combinations[player_choice] == ai_choice:
-            self.player_score += 1
-            result = "YOU WIN!"
-        else:
-            self.ai_score += 1
-            result = "AI WINS!"
+        result = "YOU WIN!" if round_result == "human" else "AI WINS!"
             
         # Update score at the top
-        self.score_label.config(text=f"Player: {self.player_score}  |  AI: {self.ai_score}")
+        self.score_label.config(text=f"Player: {self.match.human_score}  |  AI: {self.match.ai_score}")
         
         # Show round result briefly
         result_label = ttk.Label(self.game_frame,
@@ -343,16 +553,17 @@ class RockPaperScissors:
     def show_final_results(self):
         self.game_active = False
         self.camera_active = False
+        self.camera_worker.set_preview(False)
         
         # Clear game frame
         for widget in self.game_frame.winfo_children():
             widget.destroy()
         
         # Show final results
-        result_text = f"Game Over!\n\nFinal Score:\nPlayer: {self.player_score}\nAI: {self.ai_score}\n\n"
-        if self.player_score > self.ai_score:
+        result_text = f"Game Over!\n\nFinal Score:\nPlayer: {self.match.human_score}\nAI: {self.match.ai_score}\n\n"
+        if self.match.winner() == "human":
             result_text += "You Win! 🎉"
-        elif self.player_score < self.ai_score:
+        elif self.match.winner() == "ai":
             result_text += "AI Wins! 🤖"
         else:
             result_text += "It's a Tie! 🤝"
@@ -386,9 +597,7 @@ class RockPaperScissors:
 
     def restart_game(self):
         # Reset game state
-        self.player_score = 0
-        self.ai_score = 0
-        self.round_number = 0
+        self.match.reset()
         self.countdown = 3
         
         # Clear and recreate game screen
@@ -397,7 +606,10 @@ class RockPaperScissors:
         
         # Restart game
         self.camera_active = True
+        self.camera_worker.set_preview(True)
         self.game_active = True
+        self.shown_frame_id = 0
+        self.update_camera()
         self.start_round()
 
     def toggle_pause(self):
@@ -411,13 +623,20 @@ class RockPaperScissors:
     def quit_game(self):
         self.camera_active = False
         self.game_active = False
-        if hasattr(self, 'cap'):
+        if self.camera_worker:
+            self.camera_worker.stop()
+        if self.cap:
             self.cap.release()
+        self.scores.close()
         self.root.destroy()
         
     def run(self):
         self.root.mainloop()
 
 if __name__ == "__main__":
-    game = RockPaperScissors()
+    parser = argparse.ArgumentParser(description="Rock Paper Scissors (Tk)")
+    parser.add_argument("--classifier", metavar="MODEL",
+                        help="learned gesture model from classifier.py instead of the finger-count rule")
+    args = parser.parse_args()
+    game = RockPaperScissors(classifier_path=args.classifier)
     game.run()
\ No newline at end of file
@@ -0,0 +1,197 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from gestures import GESTURES, GESTURE_CODES
+
+# Moves are int8 codes in GESTURES order, so (move + 1) % 3 beats move
+NUM_MOVES = len(GESTURES)
+# Outcome for the first player indexed by (first - second) % 3
+OUTCOME = np.array([0, 1, -1], dtype=np.int8)
+COUNT_LIMIT = 1 << 16
+
+def counter_move(codes):
+    return (codes + 1) % NUM_MOVES
+
+def outcome(first, second):
+    # +1 where the first move wins, -1 where it loses, 0 on a tie
+    return OUTCOME[(first - second) % NUM_MOVES]
+
+class Strategy:
+    # An AI strategy playing `games` independent sessions at once. choose()
+    # returns one int8 move per game and observe() feeds back the moves
+    # actually played; both cost the same no matter how long a session runs.
+    def __init__(self, games=1, seed=None):
+        self.games = games
+        self.rng = np.random.default_rng(seed)
+        self.index = np.arange(games)
+
+    def choose(self):
+        return self.rng.integers(0, NUM_MOVES, self.games, dtype=np.int8)
+
+    def observe(self, human, ai):
+        pass
+
+    def _predict(self, counts):
+        # Most frequent move per row; random jitter below 1 breaks ties
+        return np.argmax(counts + self.rng.random(counts.shape), axis=1).astype(np.int8)
+
+class RandomStrategy(Strategy):
+    pass
+
+class FrequencyStrategy(Strategy):
+    # Counters the human's most frequent move. Counts are halved when one
+    # reaches `limit`, so old habits fade and the counters stay bounded.
+    def __init__(self, games=1, seed=None, limit=COUNT_LIMIT):
+        super().__init__(games, seed)
+        self.limit = limit
+        self.counts = np.zeros((games, NUM_MOVES), dtype=np.int32)
+
+    def choose(self):
+        return counter_move(self._predict(self.counts))
+
+    def observe(self, human, ai):
+        self.counts[self.index, human] += 1
+        full = self.counts[self.index, human] >= self.limit
+        if full.any():
+            self.counts[full] >>= 1
+
+class MarkovStrategy(Strategy):
+    # Order-n Markov model over the human's moves: counts which move
+    # followed each context of the last `order` moves and counters the
+    # likeliest next one.
+    def __init__(self, games=1, seed=None, order=2, limit=COUNT_LIMIT):
+        super().__init__(games, seed)
+        self.limit = limit
+        self.contexts = NUM_MOVES ** order
+        self.counts = np.zeros((games, self.contexts, NUM_MOVES), dtype=np.int32)
+        self.context = np.zeros(games, dtype=np.int64)
+
+    def choose(self):
+        return counter_move(self._predict(self.counts[self.index, self.context]))
+
+    def observe(self, human, ai):
+        self.counts[self.index, self.context, human] += 1
+        full = self.counts[self.index, self.context, human] >= self.limit
+        if full.any():
+            self.counts[self.index[full], self.context[full]] >>= 1
+        self.context = (self.context * NUM_MOVES + human) % self.contexts
+
+class EnsembleStrategy(Strategy):
+    # Plays the move of whichever member has scored best recently, per
+    # game. Every member is scored on every round as if it had played, with
+    # exponential decay so the ensemble switches when the human adapts.
+    def __init__(self, games=1, seed=None, decay=0.9, members=None):
+        super().__init__(games, seed)
+        self.decay = decay
+        rng = np.random.default_rng(seed)
+        seeds = rng.integers(0, 2**32, 5)
+        self.members = members or [
+            RandomStrategy(games, seeds[0]),
+            FrequencyStrategy(games, seeds[1]),
+            MarkovStrategy(games, seeds[2], order=1),
+            MarkovStrategy(games, seeds[3], order=2),
+            MarkovStrategy(games, seeds[4], order=3),
+        ]
+        self.scores = np.zeros((len(self.members), games), dtype=np.float64)
+        self.proposals = np.zeros((len(self.members), games), dtype=np.int8)
+
+    def choose(self):
+        for i, member in enumerate(self.members):
+            self.proposals[i] = member.choose()
+        # Tiny jitter only breaks exact ties between members
+        best = np.argmax(self.scores + self.rng.random(self.scores.shape) * 1e-9, axis=0)
+        return self.proposals[best, self.index]
+
+    def observe(self, human, ai):
+        self.scores *= self.decay
+        self.scores += outcome(self.proposals, human)
+        for member in self.members:
+            member.observe(human, ai)
+
+STRATEGIES = {
+    "random": RandomStrategy,
+    "frequency": FrequencyStrategy,
+    "markov": MarkovStrategy,
+    "ensemble": EnsembleStrategy,
+}
+
+class Opponent:
+    # Single-game adapter used by engine.Match, speaking move names
+    def __init__(self, strategy):
+        self.strategy = strategy
+
+    def choose(self):
+        return GESTURES[int(self.strategy.choose()[0])]
+
+    def observe(self, human_move, ai_move):
+        human = np.array([GESTURE_CODES[human_move]], dtype=np.int8)
+        ai = np.array([GESTURE_CODES[ai_move]], dtype=np.int8)
+        self.strategy.observe(human, ai)
+
+def make_opponent(name="random", seed=None):
+    return Opponent(STRATEGIES[name](games=1, seed=seed))
+
+# Scripted humans for the simulation: (step, last_ai, rng, games) -> moves
+HUMANS = {
+    "random": lambda step, last_ai, rng, games: rng.integers(0, NUM_MOVES, games, dtype=np.int8),
+    "constant": lambda step, last_ai, rng, games: np.zeros(games, dtype=np.int8),
+    "cycle": lambda step, last_ai, rng, games: np.full(games, step % NUM_MOVES, dtype=np.int8),
+    "biased": lambda step, last_ai, rng, games: rng.choice(
+        NUM_MOVES, games, p=[0.5, 0.3, 0.2]).astype(np.int8),
+    "copy_last": lambda step, last_ai, rng, games: last_ai.copy(),
+    "beat_last": lambda step, last_ai, rng, games: counter_move(last_ai),
+}
+
+def simulate(strategy_name, human_name, rounds=200, games=10000, seed=0):
+    # Plays `rounds` rounds in each of `games` parallel sessions
+    strategy = STRATEGIES[strategy_name](games=games, seed=seed)
+    human_strategy = HUMANS[human_name]
+    rng = np.random.default_rng(seed + 1)
+    last_ai = rng.integers(0, NUM_MOVES, games, dtype=np.int8)
+    wins = ties = 0
+
+    start = time.perf_counter()
+    for step in range(rounds):
+        ai = strategy.choose()
+        human = human_strategy(step, last_ai, rng, games)
+        strategy.observe(human, ai)
+        result = outcome(ai, human)
+        wins += int(np.count_nonzero(result == 1))
+        ties += int(np.count_nonzero(result == 0))
+        last_ai = ai
+    elapsed = time.perf_counter() - start
+
+    total = rounds * games
+    return {
+        "ai_win_rate": round(wins / total, 4),
+        "tie_rate": round(ties / total, 4),
+        "human_win_rate": round((total - wins - ties) / total, 4),
+        "rounds": total,
+        "rounds_per_second": round(total / elapsed) if elapsed > 0 else 0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare AI strategies against scripted human players")
+    parser.add_argument("--rounds", type=int, default=200, help="rounds per game")
+    parser.add_argument("--games", type=int, default=10000, help="games played in parallel")
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument("--humans", nargs="+", default=list(HUMANS), choices=list(HUMANS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = {}
+    for strategy_name in args.strategies:
+        for human_name in args.humans:
+            stats = simulate(strategy_name, human_name, args.rounds, args.games, args.seed)
+            results[f"{strategy_name} vs {human_name}"] = stats
+            print(f"{strategy_name:10s} vs {human_name:10s} AI wins {stats['ai_win_rate']:6.1%}  "
+                  f"ties {stats['tie_rate']:6.1%}  {stats['rounds_per_second']:>12,} rounds/s",
+                  file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
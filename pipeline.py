@@ -0,0 +1,171 @@
+import cv2
+import threading
+import time
+from collections import deque
+
+class LatestQueue:
+    # Bounded queue that drops the oldest item when full so readers
+    # always see the newest data
+    def __init__(self, maxsize=2):
+        self.items = deque(maxlen=maxsize)
+        self.cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify_all()
+
+    def get(self, timeout=None):
+        # Oldest queued item, waiting up to timeout for one to arrive
+        with self.cond:
+            if not self.items:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def get_latest(self, timeout=None):
+        # Newest queued item, discarding anything older
+        with self.cond:
+            if not self.items and timeout:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            item = self.items[-1]
+            self.dropped += len(self.items) - 1
+            self.items.clear()
+            return item
+
+    def clear(self):
+        with self.cond:
+            self.items.clear()
+
+    def depth(self):
+        return len(self.items)
+
+class StageStats:
+    def __init__(self, name, window=1.0):
+        self.name = name
+        self.window = window
+        self.count = 0
+        self.fps = 0.0
+        self.window_count = 0
+        self.window_start = time.time()
+
+    def tick(self):
+        self.count += 1
+        self.window_count += 1
+        now = time.time()
+        elapsed = now - self.window_start
+        if elapsed >= self.window:
+            self.fps = self.window_count / elapsed
+            self.window_count = 0
+            self.window_start = now
+
+class FramePipeline:
+    # Capture thread -> inference worker, with the caller acting as the
+    # render loop. Stages are joined by drop-oldest queues so a slow stage
+    # never holds back the others.
+    def __init__(self, cap, infer, queue_size=2):
+        self.cap = cap
+        self.infer = infer
+        self.frames = LatestQueue(queue_size)
+        self.jobs = LatestQueue(queue_size)
+        self.results = LatestQueue(queue_size)
+        self.inference_enabled = threading.Event()
+        self.stats = {
+            "capture": StageStats("capture"),
+            "inference": StageStats("inference"),
+            "render": StageStats("render")
+        }
+        # Captured frames not queued for inference because it was disabled
+        self.skipped_inactive = 0
+        self.running = False
+        self.threads = []
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self._capture_loop, daemon=True),
+            threading.Thread(target=self._inference_loop, daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        self.threads = []
+
+    def set_inference(self, enabled):
+        if enabled:
+            self.jobs.clear()
+            self.results.clear()
+            self.inference_enabled.set()
+        else:
+            self.inference_enabled.clear()
+
+    def _capture_loop(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.005)
+                continue
+
+            packet = (time.time(), cv2.flip(frame, 1))
+            self.frames.put(packet)
+            if self.inference_enabled.is_set():
+                self.jobs.put(packet)
+            else:
+                self.skipped_inactive += 1
+            self.stats["capture"].tick()
+
+    def _inference_loop(self):
+        while self.running:
+            # Newest job only; older ones are counted as dropped
+            packet = self.jobs.get_latest(timeout=0.1)
+            if packet is None:
+                continue
+
+            timestamp, frame = packet
+            result = self.infer(frame)
+            self.results.put((timestamp, result))
+            self.stats["inference"].tick()
+
+    def latest_frame(self, timeout=0.1):
+        packet = self.frames.get_latest(timeout)
+        if packet is not None:
+            self.stats["render"].tick()
+        return packet
+
+    def latest_result(self):
+        return self.results.get_latest()
+
+    def report(self):
+        return {
+            "fps": {name: round(stage.fps, 1) for name, stage in self.stats.items()},
+            "frames": {name: stage.count for name, stage in self.stats.items()},
+            "queue_depth": {
+                "frames": self.frames.depth(),
+                "jobs": self.jobs.depth(),
+                "results": self.results.depth()
+            },
+            "dropped": {
+                "frames": self.frames.dropped,
+                "jobs": self.jobs.dropped,
+                "results": self.results.dropped
+            },
+            "skipped_inactive": self.skipped_inactive
+        }
+
+    def status_text(self):
+        fps = self.stats
+        return (f"cap {fps['capture'].fps:.0f} | inf {fps['inference'].fps:.0f} | "
+                f"render {fps['render'].fps:.0f} fps | "
+                f"queues {self.frames.depth()}/{self.jobs.depth()}/{self.results.depth()}")
@@ -0,0 +1,103 @@
+import json
+import time
+
+import numpy as np
+
+class FrameProfiler:
+    # Per-frame stage timings kept in a fixed-size ring buffer. Each call to
+    # mark(stage) charges the time since the previous mark to that stage.
+    # When disabled every method returns immediately.
+    def __init__(self, stages, enabled=False, capacity=600):
+        self.stages = list(stages)
+        self.columns = {stage: i for i, stage in enumerate(self.stages)}
+        self.enabled = enabled
+        self.capacity = capacity
+
+        self.starts = np.zeros((capacity, len(self.stages)))
+        self.durations = np.zeros((capacity, len(self.stages)))
+        self.frame_starts = np.zeros(capacity)
+        self.count = 0
+        self.row = 0
+        self.last = 0.0
+        self.origin = time.perf_counter()
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.row = self.count % self.capacity
+        self.starts[self.row] = 0.0
+        self.durations[self.row] = 0.0
+        self.last = time.perf_counter()
+        self.frame_starts[self.row] = self.last
+
+    def mark(self, stage):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        column = self.columns[stage]
+        if not self.durations[self.row, column]:
+            self.starts[self.row, column] = self.last
+        self.durations[self.row, column] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.count += 1
+
+    def _filled(self):
+        return min(self.count, self.capacity)
+
+    def fps(self):
+        filled = self._filled()
+        if filled < 2:
+            return 0.0
+        starts = self.frame_starts[:filled]
+        span = starts.max() - starts.min()
+        return (filled - 1) / span if span > 0 else 0.0
+
+    def stage_means_ms(self):
+        filled = self._filled()
+        if not filled:
+            return {stage: 0.0 for stage in self.stages}
+        means = self.durations[:filled].mean(axis=0) * 1000
+        return dict(zip(self.stages, means.tolist()))
+
+    def overlay_lines(self):
+        lines = [f"FPS: {self.fps():.1f}"]
+        for stage, ms in self.stage_means_ms().items():
+            lines.append(f"{stage}: {ms:.2f} ms")
+        return lines
+
+    def summary(self):
+        filled = self._filled()
+        summary = {"frames": self.count, "fps": round(self.fps(), 1), "stages": {}}
+        for stage, column in self.columns.items():
+            ms = self.durations[:filled, column] * 1000
+            summary["stages"][stage] = {
+                "mean_ms": round(float(ms.mean()), 3) if filled else 0.0,
+                "p95_ms": round(float(np.percentile(ms, 95)), 3) if filled else 0.0,
+                "max_ms": round(float(ms.max()), 3) if filled else 0.0
+            }
+        return summary
+
+    def dump_chrome_trace(self, path):
+        # Chrome trace event format, viewable in chrome://tracing or Perfetto
+        filled = self._filled()
+        rows = sorted(range(filled), key=lambda row: self.frame_starts[row])
+        events = []
+        for row in rows:
+            for stage, column in self.columns.items():
+                duration = self.durations[row, column]
+                if not duration:
+                    continue
+                events.append({
+                    "name": stage,
+                    "ph": "X",
+                    "pid": 0,
+                    "tid": 0,
+                    "ts": (self.starts[row, column] - self.origin) * 1e6,
+                    "dur": duration * 1e6
+                })
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "otherData": self.summary()}, f)
@@ -1,99 +1,211 @@
 import streamlit as st
 import cv2
-import mediapipe as mp
-import random
 import time
 import numpy as np
+import threading
 from PIL import Image
-
-# Initialize Mediapipe
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.7)
-mp_draw = mp.solutions.drawing_utils
+from engine import Match, MediaPipeDetector
+from opponents import make_opponent
+from score_store import MatchHistory, ScoreStore
+from game_server import AdmissionError, GameServer
+
+# Optional continuous streaming; falls back to st.camera_input snapshots
+try:
+    import av
+    from streamlit_webrtc import WebRtcMode, webrtc_streamer
+except ImportError:
+    webrtc_streamer = None
+
+MAX_ROUNDS = 3
+OPPONENT = "ensemble"
+
+# Hand detection settings; snapshots are independent stills, so no ROI tracking
+DETECTOR_CONFIG = {
+    "min_detection_confidence": 0.7,
+    "min_tracking_confidence": 0.7,
+    "detect_scale": 1.0,
+    "roi_tracking": False,
+}
+RESOURCE_PREFIX = "_resource:"
+
+def get_detector(config=DETECTOR_CONFIG):
+    # The hand tracker is stateful, so every session gets its own graph.
+    # It is kept in session_state so reruns reuse it instead of rebuilding.
+    key = RESOURCE_PREFIX + "detector:" + repr(sorted(config.items()))
+    if key not in st.session_state:
+        st.session_state[key] = MediaPipeDetector(**config)
+    return st.session_state[key]
+
+def get_opponent():
+    # Kept across "Play Again" so the AI keeps learning this player
+    key = RESOURCE_PREFIX + "opponent"
+    if key not in st.session_state:
+        st.session_state[key] = make_opponent(OPPONENT)
+    return st.session_state[key]
+
+@st.cache_resource
+def get_score_store():
+    # One writer per server process, shared by all sessions
+    return ScoreStore()
+
+def get_history():
+    key = RESOURCE_PREFIX + "history"
+    if key not in st.session_state:
+        st.session_state[key] = MatchHistory(get_score_store(), frontend="streamlit")
+    return st.session_state[key]
+
+def new_match():
+    return Match(max_rounds=MAX_ROUNDS, opponent=get_opponent(),
+                 on_round=get_history().round_played)
 
 # Initialize game variables
 if "page" not in st.session_state:
     st.session_state.page = "start"
-if "game_state" not in st.session_state:
-    st.session_state.game_state = "countdown"
-if "countdown_timer" not in st.session_state:
-    st.session_state.countdown_timer = 0
-if "break_timer" not in st.session_state:
-    st.session_state.break_timer = 0
-if "round" not in st.session_state:
-    st.session_state.round = 0
-if "human_score" not in st.session_state:
-    st.session_state.human_score = 0
-if "ai_score" not in st.session_state:
-    st.session_state.ai_score = 0
-if "human_move" not in st.session_state:
-    st.session_state.human_move = None
-if "ai_move" not in st.session_state:
-    st.session_state.ai_move = None
-if "round_result" not in st.session_state:
-    st.session_state.round_result = None
-
-# Load assets
-def load_assets():
+if "match" not in st.session_state:
+    st.session_state.match = new_match()
+
+@st.cache_resource
+def get_game_server(workers=4, max_sessions=32):
+    # One inference pool per server process, shared by all sessions
+    return GameServer(workers=workers, max_sessions=max_sessions).start()
+
+# Load assets once per process; cached by size so reruns skip decoding
+@st.cache_resource
+def load_assets(bg_size=(800, 600), choice_size=(300, 300)):
     assets = {
-        "bg": Image.open("assets/bg.jpg").resize((800, 600)),
-        "rock": Image.open("assets/rock.jpg").resize((300, 300)),
-        "paper": Image.open("assets/paper.jpg").resize((300, 300)),
-        "scissors": Image.open("assets/scissor.jpg").resize((300, 300)),
+        "bg": Image.open("assets/bg.jpg").resize(bg_size),
+        "rock": Image.open("assets/rock.jpg").resize(choice_size),
+        "paper": Image.open("assets/paper.jpg").resize(choice_size),
+        "scissors": Image.open("assets/scissor.jpg").resize(choice_size),
     }
     return assets
 
 assets = load_assets()
 
 # Gesture detection
-def detect_gesture(frame):
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(frame_rgb)
-
-    if not results.multi_hand_landmarks:
-        return None
-
-    hand_landmarks = results.multi_hand_landmarks[0]
-    landmarks = [[lm.x, lm.y] for lm in hand_landmarks.landmark]
-
-    # Gesture recognition logic
-    if is_rock(landmarks):
-        return "rock"
-    elif is_paper(landmarks):
-        return "paper"
-    elif is_scissors(landmarks):
-        return "scissors"
-    return None
-
-def is_rock(landmarks):
-    return abs(landmarks[4][0] - landmarks[8][0]) < 0.1 and abs(landmarks[4][1] - landmarks[8][1]) < 0.1
-
-def is_paper(landmarks):
-    return (
-        landmarks[8][1] < landmarks[6][1]
-        and landmarks[12][1] < landmarks[10][1]
-        and landmarks[16][1] < landmarks[14][1]
-        and landmarks[20][1] < landmarks[18][1]
-    )
-
-def is_scissors(landmarks):
-    return (
-        landmarks[8][1] < landmarks[6][1]
-        and landmarks[12][1] < landmarks[10][1]
-        and landmarks[16][1] > landmarks[14][1]
-        and landmarks[20][1] > landmarks[18][1]
-    )
+def detect_gesture(frame, detector=None):
+    # Streaming callbacks run off the script thread, so they pass in the
+    # session's detector instead of reading session_state
+    return (detector or get_detector()).detect(frame).gesture
 
 # Pages
 def start_page():
     st.image(assets["bg"])
     st.title("Rock Paper Scissors")
+    history = get_history()
+    history.player = st.text_input("Player name", value=history.player).strip() or "guest"
     if st.button("Start Game"):
         st.session_state.page = "game"
-        st.session_state.game_state = "countdown"
-        st.session_state.countdown_timer = time.time()
+        st.session_state.match.reset()
+
+def advance_game(match, frame, detect=detect_gesture):
+    # One tick of the shared round state machine; returns the status line to show
+    if match.state == "countdown":
+        time_left = match.tick()
+        return f"Game starts in: {time_left} seconds"
+
+    elif match.state == "playing":
+        gesture = detect(frame)
+        if gesture:
+            match.resolve_round(gesture)
+
+    elif match.state == "break":
+        time_left = match.tick()
+        if time_left > 0:
+            return f"Round {match.round} Result: {match.round_result}"
+    return None
+
+class StreamingGame:
+    # Game state for the streaming mode. Frames arrive on the WebRTC worker
+    # thread, so the state lives here behind a lock instead of in
+    # st.session_state, which is only safe to touch from the script thread.
+    def __init__(self, detector, match, server=None):
+        self.detector = detector
+        self.server = server
+        self.session_id = server.open_session() if server else None
+        self.lock = threading.Lock()
+        self.match = match
+        self.started = False
+        if server:
+            match.on_state = self.on_match_state
+
+    def on_match_state(self, state):
+        # A result still queued from the last round must not decide this one
+        if state == "playing":
+            self.server.reset_session(self.session_id)
+
+    def detect(self, frame):
+        if self.server:
+            return self.server.detect(self.session_id, frame)
+        return detect_gesture(frame, self.detector)
+
+    def video_frame_callback(self, frame):
+        image = cv2.flip(frame.to_ndarray(format="bgr24"), 1)
+        with self.lock:
+            match = self.match
+            # Start the first countdown when video actually starts flowing
+            if not self.started:
+                match.set_state("countdown")
+                self.started = True
+            status = None
+            if not match.finished:
+                status = advance_game(match, image, self.detect)
+            score = f"Round: {match.round}/{MAX_ROUNDS}  Human: {match.human_score} | AI: {match.ai_score}"
+
+        cv2.putText(image, score, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        if status:
+            cv2.putText(image, status, (10, 65), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        return av.VideoFrame.from_ndarray(image, format="bgr24")
+
+    def snapshot(self):
+        with self.lock:
+            return self.match.round, self.match.human_score, self.match.ai_score, self.match.finished
+
+    def close(self):
+        # Give the slot back to the shared pool; idle sessions are otherwise
+        # only evicted once the pool is full
+        if self.server and self.session_id is not None:
+            self.server.close_session(self.session_id)
+            self.session_id = None
+
+def streaming_game_page():
+    st.title("Rock Paper Scissors - Game")
+    if "streaming_game" not in st.session_state:
+        server = None
+        if st.sidebar.checkbox("Shared inference pool", value=False):
+            server = get_game_server()
+        try:
+            st.session_state.streaming_game = StreamingGame(get_detector(), new_match(), server)
+        except AdmissionError:
+            st.warning("Inference pool is full, using a dedicated hand tracker")
+            st.session_state.streaming_game = StreamingGame(get_detector(), new_match())
+    game = st.session_state.streaming_game
+
+    ctx = webrtc_streamer(
+        key="rps-stream",
+        mode=WebRtcMode.SENDRECV,
+        video_frame_callback=game.video_frame_callback,
+        media_stream_constraints={"video": True, "audio": False},
+        async_processing=True,
+    )
+
+    # Mirror the callback's state into the page until the match ends
+    status = st.empty()
+    while ctx.state.playing:
+        round_number, human_score, ai_score, finished = game.snapshot()
+        status.text(f"Round: {round_number}/{MAX_ROUNDS} | "
+                    f"Human: {human_score} | AI: {ai_score}")
+        if finished:
+            st.session_state.match = game.match
+            st.session_state.page = "result"
+            st.rerun()
+        time.sleep(0.2)
 
 def game_page():
+    if webrtc_streamer is not None and st.sidebar.checkbox("Streaming mode", value=True):
+        streaming_game_page()
+        return
+
     st.title("Rock Paper Scissors - Game")
     # Camera input
     frame = st.camera_input("Show your move")
@@ -101,63 +213,36 @@ def game_page():
         frame = cv2.imdecode(np.frombuffer(frame.read(), np.uint8), cv2.IMREAD_COLOR)
         frame = cv2.flip(frame, 1)
 
-        if st.session_state.game_state == "countdown":
-            time_left = int(3 - (time.time() - st.session_state.countdown_timer))
-            if time_left <= 0:
-                st.session_state.game_state = "playing"
-            st.subheader(f"Game starts in: {time_left} seconds")
-
-        elif st.session_state.game_state == "playing":
-            gesture = detect_gesture(frame)
-            if gesture:
-                st.session_state.human_move = gesture
-                st.session_state.ai_move = random.choice(["rock", "paper", "scissors"])
-
-                # Determine round result
-                if st.session_state.human_move == st.session_state.ai_move:
-                    st.session_state.round_result = "tie"
-                elif (
-                    (st.session_state.human_move == "rock" and st.session_state.ai_move == "scissors")
-                    or (st.session_state.human_move == "paper" and st.session_state.ai_move == "rock")
-                    or (st.session_state.human_move == "scissors" and st.session_state.ai_move == "paper")
-                ):
-                    st.session_state.round_result = "human"
-                    st.session_state.human_score += 1
-                else:
-                    st.session_state.round_result = "ai"
-                    st.session_state.ai_score += 1
-
-                st.session_state.round += 1
-                st.session_state.game_state = "break"
-                st.session_state.break_timer = time.time()
-
-        elif st.session_state.game_state == "break":
-            time_left = int(2 - (time.time() - st.session_state.break_timer))
-            if time_left <= 0:
-                if st.session_state.round >= 3:  # End game after 3 rounds
-                    st.session_state.page = "result"
-                else:
-                    st.session_state.game_state = "countdown"
-                    st.session_state.countdown_timer = time.time()
-            else:
-                st.subheader(f"Round {st.session_state.round} Result: {st.session_state.round_result}")
+        match = st.session_state.match
+        status = advance_game(match, frame)
+        if match.finished:
+            st.session_state.page = "result"
+        if status:
+            st.subheader(status)
 
         # Display game status
-        st.text(f"Round: {st.session_state.round}/3")
-        st.text(f"Human: {st.session_state.human_score} | AI: {st.session_state.ai_score}")
+        st.text(f"Round: {match.round}/{MAX_ROUNDS}")
+        st.text(f"Human: {match.human_score} | AI: {match.ai_score}")
 
 def result_page():
+    match = st.session_state.match
     st.title("Game Over")
-    st.text(f"Final Score: Human {st.session_state.human_score} - AI {st.session_state.ai_score}")
-    if st.session_state.human_score > st.session_state.ai_score:
+    st.text(f"Final Score: Human {match.human_score} - AI {match.ai_score}")
+    if match.winner() == "human":
         st.subheader("You Win!")
-    elif st.session_state.human_score < st.session_state.ai_score:
+    elif match.winner() == "ai":
         st.subheader("AI Wins!")
     else:
         st.subheader("It's a Tie!")
+    st.subheader("Leaderboard")
+    st.table(get_score_store().leaderboard())
     if st.button("Play Again"):
-        for key in st.session_state.keys():
-            del st.session_state[key]
+        # Keep this session's hand detector and opponent, reset everything else
+        if "streaming_game" in st.session_state:
+            st.session_state.streaming_game.close()
+        for key in list(st.session_state.keys()):
+            if not key.startswith(RESOURCE_PREFIX):
+                del st.session_state[key]
 
 # Main App
 if st.session_state.page == "start":
@@ -0,0 +1,155 @@
+import cv2
+
+class InferenceScheduler:
+    # Decides when and on what part of the frame MediaPipe Hands runs.
+    # Detection runs on a downscaled full frame; once a hand is found,
+    # later frames are cropped to the tracked hand region. Landmarks are
+    # always returned in full-frame normalized coordinates.
+    def __init__(self, hands, every_n=1, detect_scale=0.5, roi_margin=0.25, roi_min_size=160,
+                 roi_tracking=True):
+        self.hands = hands
+        self.every_n = max(1, every_n)
+        self.detect_scale = detect_scale
+        self.roi_tracking = roi_tracking
+        self.roi_margin = roi_margin
+        self.roi_min_size = roi_min_size
+
+        self.active = False
+        self.roi = None
+        self.last_result = None
+        self.last_score = 0.0
+        self.last_hands = []
+        self.last_scores = []
+        self.frame_index = 0
+        # True when the last process() call ran the model rather than
+        # returning the cached result
+        self.ran = False
+
+        self.counters = {
+            "skipped_inactive": 0,
+            "skipped_interval": 0,
+            "detect_runs": 0,
+            "roi_runs": 0,
+            "roi_misses": 0
+        }
+
+    def set_active(self, active):
+        if active and not self.active:
+            self.reset()
+        self.active = active
+
+    def reset(self):
+        self.roi = None
+        self.last_result = None
+        self.last_score = 0.0
+        self.last_hands = []
+        self.last_scores = []
+        self.frame_index = 0
+
+    def skip(self):
+        # A frame the caller dropped without asking for inference, e.g.
+        # during the countdown or between rounds
+        self.ran = False
+        self.counters["skipped_inactive"] += 1
+
+    def process(self, frame):
+        self.ran = False
+        if not self.active:
+            self.counters["skipped_inactive"] += 1
+            return None
+
+        self.frame_index += 1
+        if (self.frame_index - 1) % self.every_n:
+            self.counters["skipped_interval"] += 1
+            return self.last_result
+
+        self.ran = True
+        hand_landmarks = None
+        if self.roi is not None:
+            self.counters["roi_runs"] += 1
+            hand_landmarks = self._run_roi(frame)
+            if hand_landmarks is None:
+                self.counters["roi_misses"] += 1
+                self.roi = None
+
+        if hand_landmarks is None:
+            self.counters["detect_runs"] += 1
+            hand_landmarks = self._run_detection(frame)
+
+        if hand_landmarks is not None and self.roi_tracking:
+            self.roi = self._hand_roi(hand_landmarks, frame.shape)
+        self.last_result = hand_landmarks
+        if hand_landmarks is None:
+            self.last_hands = []
+            self.last_scores = []
+        return hand_landmarks
+
+    def process_all(self, frame):
+        # Every hand found in the frame, with matching handedness scores.
+        # Cropping to one hand's region would hide the others, so use
+        # roi_tracking=False when more than one hand is expected.
+        if self.process(frame) is None:
+            return [], []
+        return self.last_hands, self.last_scores
+
+    def _run_hands(self, image):
+        results = self.hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        if not results.multi_hand_landmarks:
+            return None
+        # Handedness score doubles as a detection confidence
+        self.last_hands = list(results.multi_hand_landmarks)
+        if results.multi_handedness:
+            self.last_scores = [h.classification[0].score for h in results.multi_handedness]
+        else:
+            self.last_scores = [1.0] * len(self.last_hands)
+        self.last_score = self.last_scores[0]
+        return self.last_hands[0]
+
+    def _run_detection(self, frame):
+        # Normalized landmarks are resolution independent, so no remap
+        if self.detect_scale != 1.0:
+            frame = cv2.resize(frame, None, fx=self.detect_scale, fy=self.detect_scale,
+                               interpolation=cv2.INTER_AREA)
+        return self._run_hands(frame)
+
+    def _run_roi(self, frame):
+        x0, y0, x1, y1 = self.roi
+        hand_landmarks = self._run_hands(frame[y0:y1, x0:x1])
+        if hand_landmarks is None:
+            return None
+
+        # Map crop-normalized landmarks back to full-frame coordinates
+        height, width = frame.shape[:2]
+        crop_w, crop_h = x1 - x0, y1 - y0
+        for lm in hand_landmarks.landmark:
+            lm.x = (x0 + lm.x * crop_w) / width
+            lm.y = (y0 + lm.y * crop_h) / height
+            lm.z = lm.z * crop_w / width
+        self.last_hands = [hand_landmarks]
+        self.last_scores = [self.last_score]
+        return hand_landmarks
+
+    def _hand_roi(self, hand_landmarks, shape):
+        height, width = shape[:2]
+        xs = [lm.x * width for lm in hand_landmarks.landmark]
+        ys = [lm.y * height for lm in hand_landmarks.landmark]
+
+        # Square box around the hand, padded so the next frame's motion fits
+        size = max(max(xs) - min(xs), max(ys) - min(ys))
+        size = max(size * (1 + 2 * self.roi_margin), self.roi_min_size)
+        cx = (max(xs) + min(xs)) / 2
+        cy = (max(ys) + min(ys)) / 2
+
+        x0 = int(max(0, cx - size / 2))
+        y0 = int(max(0, cy - size / 2))
+        x1 = int(min(width, cx + size / 2))
+        y1 = int(min(height, cy + size / 2))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        return x0, y0, x1, y1
+
+    def report(self):
+        counters = dict(self.counters)
+        counters["runs"] = counters["detect_runs"] + counters["roi_runs"]
+        counters["skipped"] = counters["skipped_inactive"] + counters["skipped_interval"]
+        return counters
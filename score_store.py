@@ -0,0 +1,338 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from engine import MOVES, round_winner
+
+DEFAULT_PATH = "scores.db"
+log = logging.getLogger(__name__)
+RESULT_CODES = {"human": 1, "tie": 0, "ai": -1}
+MOVE_CODES = {move: code for code, move in enumerate(MOVES)}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    -- Client-side key, so several processes can share one database
+    uid TEXT,
+    player TEXT NOT NULL,
+    frontend TEXT,
+    started REAL,
+    finished REAL,
+    max_rounds INTEGER,
+    human_score INTEGER,
+    ai_score INTEGER,
+    winner TEXT
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    match_id INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    round INTEGER NOT NULL,
+    t REAL NOT NULL,
+    human_move INTEGER NOT NULL,
+    ai_move INTEGER NOT NULL,
+    result INTEGER NOT NULL
+);
+-- Running totals kept up to date by the writer, so leaderboards never
+-- scan the round history
+CREATE TABLE IF NOT EXISTS player_stats (
+    player TEXT PRIMARY KEY,
+    matches INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    ties INTEGER NOT NULL DEFAULT 0,
+    rounds INTEGER NOT NULL DEFAULT 0,
+    rounds_won INTEGER NOT NULL DEFAULT 0,
+    rounds_lost INTEGER NOT NULL DEFAULT 0,
+    rock INTEGER NOT NULL DEFAULT 0,
+    paper INTEGER NOT NULL DEFAULT 0,
+    scissors INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS rounds_player_move ON rounds (player, human_move);
+CREATE INDEX IF NOT EXISTS rounds_match ON rounds (match_id);
+CREATE INDEX IF NOT EXISTS matches_player ON matches (player, finished);
+CREATE INDEX IF NOT EXISTS player_stats_wins ON player_stats (wins DESC, matches);
+"""
+
+INSERT_MATCH = ("INSERT INTO matches (uid, player, frontend, started, max_rounds) "
+                "VALUES (?, ?, ?, ?, ?)")
+INSERT_ROUND = ("INSERT INTO rounds (match_id, player, round, t, human_move, ai_move, result) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)")
+UPDATE_ROUND_STATS = """
+INSERT INTO player_stats (player, rounds, rounds_won, rounds_lost, rock, paper, scissors)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (player) DO UPDATE SET
+    rounds = rounds + excluded.rounds,
+    rounds_won = rounds_won + excluded.rounds_won,
+    rounds_lost = rounds_lost + excluded.rounds_lost,
+    rock = rock + excluded.rock,
+    paper = paper + excluded.paper,
+    scissors = scissors + excluded.scissors
+"""
+FINISH_MATCH = ("UPDATE matches SET finished = ?, human_score = ?, ai_score = ?, winner = ? "
+                "WHERE uid = ?")
+UPDATE_MATCH_STATS = """
+INSERT INTO player_stats (player, matches, wins, losses, ties) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (player) DO UPDATE SET
+    matches = matches + excluded.matches,
+    wins = wins + excluded.wins,
+    losses = losses + excluded.losses,
+    ties = ties + excluded.ties
+"""
+
+def _totals_by_player(rows):
+    # One stats upsert per player per batch instead of one per row
+    totals = {}
+    for player, *counts in rows:
+        current = totals.setdefault(player, [0] * len(counts))
+        for i, count in enumerate(counts):
+            current[i] += count
+    return [(player, *counts) for player, counts in totals.items()]
+
+class ScoreStore:
+    # Round and match history in SQLite (WAL mode). Callers only enqueue;
+    # one writer thread commits whatever has queued up, at most every
+    # `flush_interval` seconds, as a single transaction. Matches are keyed
+    # by a client-side uid and get their row id from SQLite, so several
+    # front-ends can write to the same database.
+    def __init__(self, path=DEFAULT_PATH, batch_size=512, flush_interval=0.25):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.local = threading.local()
+        self.failed_batches = 0
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        if "uid" not in [row[1] for row in conn.execute("PRAGMA table_info(matches)")]:
+            conn.execute("ALTER TABLE matches ADD COLUMN uid TEXT")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS matches_uid ON matches (uid)")
+        # Writer-side uid -> row id for matches it has inserted
+        self.match_ids = {}
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # Wait for another process's write instead of failing at once
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        # sqlite3 connections are per thread; WAL readers never block the writer
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = self._connect()
+        return conn
+
+    # Writes (non-blocking)
+
+    def start_match(self, player, frontend, max_rounds):
+        # Returns the match's uid, used by record_round and finish_match
+        match_id = uuid.uuid4().hex
+        self.queue.put(("match", (match_id, player, frontend, time.time(), max_rounds)))
+        return match_id
+
+    def record_round(self, match_id, player, round_number, human_move, ai_move, result):
+        human = MOVE_CODES[human_move]
+        won, lost = result == "human", result == "ai"
+        self.queue.put(("round", (match_id, player, round_number, time.time(),
+                                  human, MOVE_CODES[ai_move], RESULT_CODES[result]),
+                        (player, 1, won, lost, human == 0, human == 1, human == 2)))
+
+    def finish_match(self, match_id, player, human_score, ai_score, winner):
+        self.queue.put(("finish", (time.time(), human_score, ai_score, winner, match_id),
+                        (player, 1, winner == "human", winner == "ai", winner == "tie")))
+
+    def flush(self):
+        # Blocks until everything queued so far is committed
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _writer_loop(self):
+        conn = self._connect()
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.time())))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                running = False
+            self._write_batch(conn, [item for item in batch if item is not None])
+            for _ in batch:
+                self.queue.task_done()
+        conn.close()
+
+    def _write_batch(self, conn, batch):
+        # A failed batch is logged and dropped; the writer keeps going
+        if not batch:
+            return
+        try:
+            self._commit_batch(conn, batch)
+        except sqlite3.Error:
+            self.failed_batches += 1
+            log.exception("score store: dropped a batch of %d writes", len(batch))
+
+    def _match_row(self, conn, uid):
+        if uid not in self.match_ids:
+            row = conn.execute("SELECT id FROM matches WHERE uid = ?", (uid,)).fetchone()
+            if row is None:
+                return None
+            self.match_ids[uid] = row[0]
+        return self.match_ids[uid]
+
+    def _commit_batch(self, conn, batch):
+        rounds = [item for item in batch if item[0] == "round"]
+        finishes = [item for item in batch if item[0] == "finish"]
+        with conn:
+            inserted = {}
+            for kind, row, *_ in batch:
+                if kind == "match":
+                    inserted[row[0]] = conn.execute(INSERT_MATCH, row).lastrowid
+            # Rounds of a match whose insert was lost are skipped
+            rows = []
+            for item in rounds:
+                uid = item[1][0]
+                match_row = inserted.get(uid) or self._match_row(conn, uid)
+                if match_row is not None:
+                    rows.append((match_row, *item[1][1:]))
+            conn.executemany(INSERT_ROUND, rows)
+            conn.executemany(UPDATE_ROUND_STATS, _totals_by_player(item[2] for item in rounds))
+            conn.executemany(FINISH_MATCH, [item[1] for item in finishes])
+            conn.executemany(UPDATE_MATCH_STATS, _totals_by_player(item[2] for item in finishes))
+        # Committed: remember open matches, forget finished ones
+        self.match_ids.update(inserted)
+        for item in finishes:
+            self.match_ids.pop(item[1][-1], None)
+
+    # Queries
+
+    def leaderboard(self, limit=10):
+        rows = self._reader().execute(
+            "SELECT player, matches, wins, losses, ties, rounds, rounds_won "
+            "FROM player_stats WHERE matches > 0 ORDER BY wins DESC, matches LIMIT ?",
+            (limit,)).fetchall()
+        return [{
+            "player": player, "matches": matches, "wins": wins, "losses": losses, "ties": ties,
+            "round_win_rate": round(rounds_won / rounds, 3) if rounds else 0.0
+        } for player, matches, wins, losses, ties, rounds, rounds_won in rows]
+
+    def move_frequencies(self, player=None):
+        if player is None:
+            row = self._reader().execute(
+                "SELECT SUM(rock), SUM(paper), SUM(scissors) FROM player_stats").fetchone()
+        else:
+            row = self._reader().execute(
+                "SELECT rock, paper, scissors FROM player_stats WHERE player = ?",
+                (player,)).fetchone()
+        return dict(zip(MOVES, [count or 0 for count in row or (0, 0, 0)]))
+
+    def recent_matches(self, player, limit=10):
+        rows = self._reader().execute(
+            "SELECT id, finished, human_score, ai_score, winner FROM matches "
+            "WHERE player = ? AND finished IS NOT NULL ORDER BY finished DESC LIMIT ?",
+            (player, limit)).fetchall()
+        return [dict(zip(("id", "finished", "human_score", "ai_score", "winner"), row)) for row in rows]
+
+class MatchHistory:
+    # Mirrors one front-end's Match into the store. Pass round_played as
+    # the Match's on_round callback; a match starts on its first round and
+    # is finished once max_rounds have been played.
+    def __init__(self, store, player="guest", frontend="game"):
+        self.store = store
+        self.player = player
+        self.frontend = frontend
+        self.match_id = None
+
+    def round_played(self, match):
+        if self.match_id is None or match.round == 1:
+            self.match_id = self.store.start_match(self.player, self.frontend, match.max_rounds)
+        self.store.record_round(self.match_id, self.player, match.round,
+                                match.human_move, match.ai_move, match.round_result)
+        if match.round >= match.max_rounds:
+            self.store.finish_match(self.match_id, self.player, match.human_score,
+                                    match.ai_score, match.winner())
+            self.match_id = None
+
+def populate(store, players, matches, max_rounds, seed=0):
+    # Synthetic history for sizing and query benchmarks
+    rng = random.Random(seed)
+    names = [f"player{i}" for i in range(players)]
+    for _ in range(matches):
+        player = rng.choice(names)
+        match_id = store.start_match(player, "bench", max_rounds)
+        human_score = ai_score = 0
+        for round_number in range(1, max_rounds + 1):
+            human, ai = rng.choice(MOVES), rng.choice(MOVES)
+            result = round_winner(human, ai)
+            human_score += result == "human"
+            ai_score += result == "ai"
+            store.record_round(match_id, player, round_number, human, ai, result)
+        winner = "human" if human_score > ai_score else "ai" if ai_score > human_score else "tie"
+        store.finish_match(match_id, player, human_score, ai_score, winner)
+
+def main():
+    parser = argparse.ArgumentParser(description="Score history: leaderboard and benchmarks")
+    parser.add_argument("command", choices=["leaderboard", "moves", "bench"])
+    parser.add_argument("--db", help=f"database (default: {DEFAULT_PATH}; bench uses a "
+                                      "throwaway file unless given)")
+    parser.add_argument("--player")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--matches", type=int, default=200000, help="matches to generate for bench")
+    parser.add_argument("--players", type=int, default=500, help="players to generate for bench")
+    args = parser.parse_args()
+
+    # Synthetic bench data must never land in the live leaderboard
+    throwaway = args.command == "bench" and args.db is None
+    if throwaway:
+        fd, args.db = tempfile.mkstemp(prefix="rps_bench_", suffix=".db")
+        os.close(fd)
+    store = ScoreStore(args.db or DEFAULT_PATH, batch_size=4096)
+    try:
+        if args.command == "leaderboard":
+            print(json.dumps(store.leaderboard(args.limit), indent=2))
+        elif args.command == "moves":
+            print(json.dumps(store.move_frequencies(args.player), indent=2))
+        else:
+            start = time.perf_counter()
+            populate(store, args.players, args.matches, max_rounds=5)
+            store.flush()
+            written = time.perf_counter() - start
+            timings = {}
+            for name, query in (("leaderboard", lambda: store.leaderboard(args.limit)),
+                                ("moves", lambda: store.move_frequencies()),
+                                ("player_moves", lambda: store.move_frequencies("player0")),
+                                ("recent_matches", lambda: store.recent_matches("player0"))):
+                start = time.perf_counter()
+                query()
+                timings[name + "_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            print(json.dumps({"matches_written": args.matches, "write_seconds": round(written, 2),
+                              "queries": timings}, indent=2))
+    finally:
+        store.close()
+        if throwaway:
+            store._reader().close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(args.db + suffix):
+                    os.remove(args.db + suffix)
+
+if __name__ == "__main__":
+    main()
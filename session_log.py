@@ -0,0 +1,241 @@
+import json
+import queue
+import struct
+import threading
+
+import cv2
+import numpy as np
+
+import gestures
+from engine import Detection
+from opponents import make_opponent
+
+# File layout: MAGIC, then blocks of <uint32 header length><JSON header>
+# followed by the raw bytes of each column listed in the header. The first
+# block carries the session metadata; every block may carry events.
+MAGIC = b"RPSLOG1\n"
+STATES = ("countdown", "playing", "break", "finished")
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+class _Chunk:
+    # Preallocated columns for `size` rows
+    def __init__(self, size):
+        self.t = np.zeros(size, dtype=np.float64)
+        self.state = np.zeros(size, dtype=np.int8)
+        # 1 where a detection was fed to the stabilizer on that frame
+        self.fed = np.zeros(size, dtype=np.uint8)
+        self.gesture = np.full(size, gestures.NO_GESTURE, dtype=np.int8)
+        self.score = np.zeros(size, dtype=np.float32)
+        self.landmarks = np.full((size, gestures.NUM_LANDMARKS, 3), np.nan, dtype=np.float32)
+        self.images = [None] * size
+        self.events = []
+        self.rows = 0
+
+    def clear(self):
+        self.fed[:self.rows] = 0
+        self.score[:self.rows] = 0
+        self.gesture[:self.rows] = gestures.NO_GESTURE
+        self.landmarks[:self.rows] = np.nan
+        self.images = [None] * len(self.images)
+        self.events = []
+        self.rows = 0
+
+class SessionRecorder:
+    # Appends one row per game frame (clock, match state, the detection the
+    # game consumed and its landmarks) plus events to a columnar binary log.
+    # Rows fill preallocated chunks; full chunks are JPEG-encoded and written
+    # by a background thread, so the game loop only copies into arrays.
+    def __init__(self, path, meta, jpeg_quality=None, chunk_rows=256, max_backlog=8):
+        self.path = path
+        self.jpeg_quality = jpeg_quality
+        self.chunk_rows = chunk_rows
+        self.max_backlog = max_backlog
+        self.buffer = gestures.LandmarkBuffer()
+        self.rows = 0
+        self.dropped_images = 0
+        self.free = queue.Queue()
+        self.chunk = _Chunk(chunk_rows)
+
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self._write_block({"meta": meta, "events": [], "columns": []}, [])
+
+        self.backlog = queue.Queue()
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+
+    def add(self, t, state, detection=None, image=None):
+        chunk = self.chunk
+        row = chunk.rows
+        chunk.t[row] = t
+        chunk.state[row] = STATE_CODES[state]
+        if detection is not None:
+            chunk.fed[row] = 1
+            chunk.score[row] = detection.score
+            if detection.gesture:
+                chunk.gesture[row] = gestures.GESTURE_CODES[detection.gesture]
+            if detection.hand is not None:
+                chunk.landmarks[row] = self.buffer.fill(detection.hand)
+        if image is not None:
+            # Under disk backpressure frames are dropped, never rows
+            if self.backlog.qsize() < self.max_backlog:
+                chunk.images[row] = image
+            else:
+                self.dropped_images += 1
+        chunk.rows += 1
+        self.rows += 1
+        if chunk.rows == self.chunk_rows:
+            self._flush()
+
+    def event(self, event):
+        # Events are stamped with the index of the row they precede
+        self.chunk.events.append(dict(event, frame=self.rows))
+
+    def _flush(self):
+        self.backlog.put(self.chunk)
+        try:
+            self.chunk = self.free.get_nowait()
+        except queue.Empty:
+            self.chunk = _Chunk(self.chunk_rows)
+
+    def close(self):
+        if self.chunk.rows or self.chunk.events:
+            self._flush()
+        self.backlog.put(None)
+        self.thread.join()
+        self.file.close()
+
+    def _writer_loop(self):
+        while True:
+            chunk = self.backlog.get()
+            if chunk is None:
+                break
+            self._write_chunk(chunk)
+            chunk.clear()
+            self.free.put(chunk)
+
+    def _write_chunk(self, chunk):
+        rows = chunk.rows
+        sizes = np.zeros(rows + 1, dtype=np.int64)
+        encoded = []
+        for row, image in enumerate(chunk.images[:rows]):
+            if image is not None:
+                ok, data = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                if ok:
+                    encoded.append(data.ravel())
+                    sizes[row + 1] = data.size
+        columns = [
+            ("t", chunk.t[:rows]),
+            ("state", chunk.state[:rows]),
+            ("fed", chunk.fed[:rows]),
+            ("gesture", chunk.gesture[:rows]),
+            ("score", chunk.score[:rows]),
+            ("landmarks", chunk.landmarks[:rows]),
+            ("jpeg_offsets", np.cumsum(sizes)),
+            ("jpeg", np.concatenate(encoded) if encoded else np.zeros(0, dtype=np.uint8)),
+        ]
+        header = {
+            "events": chunk.events,
+            "columns": [[name, array.dtype.str, list(array.shape)] for name, array in columns]
+        }
+        self._write_block(header, [array for _, array in columns])
+
+    def _write_block(self, header, arrays):
+        data = json.dumps(header).encode()
+        self.file.write(struct.pack("<I", len(data)))
+        self.file.write(data)
+        for array in arrays:
+            self.file.write(np.ascontiguousarray(array).data)
+
+class SessionLog:
+    # A recorded session loaded back into whole columns
+    def __init__(self, meta, columns, events, jpegs):
+        self.meta = meta
+        self.events = events
+        self.jpegs = jpegs
+        self.t = columns["t"]
+        self.state = columns["state"]
+        self.fed = columns["fed"]
+        self.gesture = columns["gesture"]
+        self.score = columns["score"]
+        self.landmarks = columns["landmarks"]
+        self.blank = None
+
+    @property
+    def rows(self):
+        return len(self.t)
+
+    def frame(self, row, shape=(480, 640, 3)):
+        # The recorded camera frame, or a reused blank one if none was kept
+        data = self.jpegs[row]
+        if len(data):
+            return cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if self.blank is None:
+            self.blank = np.zeros(shape, dtype=np.uint8)
+        return self.blank.copy()
+
+    def detection(self, row):
+        # The detection the game consumed on this row, or None
+        if not self.fed[row]:
+            return None
+        code = self.gesture[row]
+        landmarks = self.landmarks[row]
+        return Detection(gestures.GESTURES[code] if code != gestures.NO_GESTURE else None,
+                         None if np.isnan(landmarks[0, 0]) else landmarks,
+                         float(self.score[row]))
+
+    def ai_moves(self):
+        return [event["ai"] for event in self.events if event["kind"] == "round"]
+
+def read_session(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session log")
+        meta = {}
+        events = []
+        parts = {}
+        jpegs = []
+        while True:
+            raw = f.read(4)
+            if len(raw) < 4:
+                break
+            header = json.loads(f.read(struct.unpack("<I", raw)[0]))
+            meta.update(header.get("meta", {}))
+            events.extend(header["events"])
+            block = {}
+            for name, dtype, shape in header["columns"]:
+                dtype = np.dtype(dtype)
+                count = int(np.prod(shape))
+                block[name] = np.frombuffer(f.read(count * dtype.itemsize), dtype).reshape(shape)
+            if not block:
+                continue
+            offsets = block.pop("jpeg_offsets")
+            blob = block.pop("jpeg")
+            jpegs.extend(blob[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1))
+            for name, array in block.items():
+                parts.setdefault(name, []).append(array)
+
+    empty = {
+        "t": np.zeros(0, dtype=np.float64),
+        "state": np.zeros(0, dtype=np.int8),
+        "fed": np.zeros(0, dtype=np.uint8),
+        "gesture": np.zeros(0, dtype=np.int8),
+        "score": np.zeros(0, dtype=np.float32),
+        "landmarks": np.zeros((0, gestures.NUM_LANDMARKS, 3), dtype=np.float32),
+    }
+    columns = {name: np.concatenate(parts[name]) if name in parts else array
+               for name, array in empty.items()}
+    return SessionLog(meta, columns, events, jpegs)
+
+class ReplayOpponent:
+    # Plays back the AI moves of a recorded session in order, falling back
+    # to random moves if a re-detected replay plays more rounds
+    def __init__(self, moves):
+        self.moves = iter(moves)
+        self.fallback = make_opponent("random")
+
+    def choose(self):
+        return next(self.moves, None) or self.fallback.choose()
+
+    def observe(self, human_move, ai_move):
+        pass
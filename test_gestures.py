@@ -0,0 +1,76 @@
+import numpy as np
+
+import gestures
+
+# The per-hand rules gestures.classify_batch replaced, as they were in
+# game.py and rps_game.py, on [x, y] lists of Python floats
+
+def is_rock(landmarks):
+    return (abs(landmarks[4][0] - landmarks[8][0]) < 0.1 and
+            abs(landmarks[4][1] - landmarks[8][1]) < 0.1)
+
+def is_paper(landmarks):
+    return (landmarks[8][1] < landmarks[6][1] and
+            landmarks[12][1] < landmarks[10][1] and
+            landmarks[16][1] < landmarks[14][1] and
+            landmarks[20][1] < landmarks[18][1])
+
+def is_scissors(landmarks):
+    return (landmarks[8][1] < landmarks[6][1] and
+            landmarks[12][1] < landmarks[10][1] and
+            landmarks[16][1] > landmarks[14][1] and
+            landmarks[20][1] > landmarks[18][1])
+
+def old_classify(points):
+    # MediaPipe hands out float32 coordinates read back as Python floats
+    landmarks = [[float(x), float(y)] for x, y, _ in points]
+    if is_rock(landmarks):
+        return "rock"
+    elif is_paper(landmarks):
+        return "paper"
+    elif is_scissors(landmarks):
+        return "scissors"
+    return None
+
+def check_parity(points):
+    labels = gestures.labels(gestures.classify_batch(points))
+    expected = [old_classify(hand) for hand in points]
+    mismatches = [i for i, (a, b) in enumerate(zip(labels, expected)) if a != b]
+    assert not mismatches, f"{len(mismatches)} mismatches, first at hand {mismatches[0]}"
+    # The single-hand path agrees with the batch
+    for hand, label in zip(points[:200], labels):
+        assert gestures.classify(hand) == label
+
+def test_random_hands_match_old_rules():
+    rng = np.random.default_rng(0)
+    points = rng.random((20000, gestures.NUM_LANDMARKS, 3), dtype=np.float32)
+    check_parity(points)
+
+def test_ties_match_old_rules():
+    # Coordinates on a coarse grid, so fingertips level with their joints
+    # and thumb-index gaps of exactly 0.1 come up often
+    rng = np.random.default_rng(1)
+    grid = np.float32([0.2, 0.3, 0.4, 0.5])
+    points = grid[rng.integers(0, len(grid), (20000, gestures.NUM_LANDMARKS, 3))]
+    check_parity(points)
+
+    level = points[:, gestures.FINGER_TIPS, 1] == points[:, gestures.FINGER_PIPS, 1]
+    gap = np.abs(points[:, 4, :2].astype(np.float64) - points[:, 8, :2].astype(np.float64))
+    assert level.any() and np.isclose(gap, 0.1).any()
+
+def test_gestures_in_priority_order():
+    hand = np.full((gestures.NUM_LANDMARKS, 3), 0.5, dtype=np.float32)
+    # Every finger extended and the thumb far from the index tip: paper
+    hand[gestures.FINGER_PIPS, 1] = 0.6
+    hand[gestures.FINGER_TIPS, 1] = 0.4
+    hand[4, :2] = (0.9, 0.9)
+    assert gestures.classify(hand) == "paper"
+
+    scissors = hand.copy()
+    scissors[[16, 20], 1] = 0.7
+    assert gestures.classify(scissors) == "scissors"
+
+    # Thumb touching the index tip wins over the finger rules
+    rock = hand.copy()
+    rock[4, :2] = rock[8, :2] + 0.05
+    assert gestures.classify(rock) == "rock"
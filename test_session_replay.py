@@ -0,0 +1,87 @@
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pygame")
+
+import gestures
+from session_log import read_session
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def hand(gesture):
+    # MediaPipe-style landmarks that the rules classify as `gesture`
+    points = np.full((gestures.NUM_LANDMARKS, 3), 0.5, dtype=np.float32)
+    points[gestures.FINGER_PIPS, 1] = 0.6
+    points[gestures.FINGER_TIPS, 1] = 0.4
+    points[4, :2] = (0.9, 0.9)
+    if gesture == "scissors":
+        points[[16, 20], 1] = 0.7
+    elif gesture == "rock":
+        points[4, :2] = points[8, :2]
+    return types.SimpleNamespace(landmark=[types.SimpleNamespace(x=x, y=y, z=z) for x, y, z in points])
+
+class StubHands:
+    # Stands in for mp.solutions.hands.Hands: cycles through the moves,
+    # ten frames each, with a few empty frames between them
+    def __init__(self, **kwargs):
+        self.calls = 0
+
+    def process(self, image):
+        self.calls += 1
+        step = self.calls % 13
+        hands = None
+        if step < 10:
+            hands = [hand(gestures.GESTURES[self.calls // 13 % 3])]
+        return types.SimpleNamespace(multi_hand_landmarks=hands, multi_handedness=None)
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def game_module(monkeypatch, tmp_path):
+    solutions = types.SimpleNamespace(
+        hands=types.SimpleNamespace(Hands=StubHands, HAND_CONNECTIONS=()),
+        drawing_utils=types.SimpleNamespace(draw_landmarks=lambda *args: None))
+    monkeypatch.setitem(sys.modules, "mediapipe", types.SimpleNamespace(solutions=solutions))
+    monkeypatch.chdir(ROOT)
+    import game
+    import video_cache
+
+    class NoPreloadCache(video_cache.VideoCache):
+        # The result videos are never shown; skip the background decode
+        def preload(self, paths):
+            pass
+
+    monkeypatch.setattr(game, "VideoCache",
+                        lambda size: NoPreloadCache(size, str(tmp_path / "videos")))
+    return game
+
+def test_record_then_replay_is_deterministic(game_module, tmp_path):
+    path = str(tmp_path / "session.rpslog")
+    game = game_module.RockPaperScissors(record_path=path, source=os.path.join("assets", "win.mp4"))
+    game.cap.release()
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    game.now = 1000.0
+    game.start_game()
+    for i in range(1, 3000):
+        game.now = 1000.0 + i / 30
+        game.game_step(frame)
+        if game.page == "result":
+            break
+    game.recorder.close()
+    assert game.match.finished
+
+    log = read_session(path)
+    assert len(log.ai_moves()) == game.match.max_rounds
+
+    replay = game_module.RockPaperScissors(replay=log)
+    report = replay.run_replay()
+    assert report["deterministic"], report["first_mismatch"]
+    assert report["frames"] == log.rows
+    assert replay.match.human_score == game.match.human_score
+    assert replay.match.ai_score == game.match.ai_score
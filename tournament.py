@@ -0,0 +1,169 @@
+import argparse
+import itertools
+import json
+import sys
+import time
+
+import numpy as np
+
+from gestures import GESTURES
+from opponents import NUM_MOVES, STRATEGIES
+
+class Rules:
+    # A rule variant as a payoff matrix: payoff[a, b] is +1 when move a
+    # beats move b, -1 when it loses and 0 otherwise
+    def __init__(self, moves, beats):
+        self.moves = tuple(moves)
+        codes = {move: code for code, move in enumerate(self.moves)}
+        self.payoff = np.zeros((len(self.moves), len(self.moves)), dtype=np.int8)
+        for winner, losers in beats.items():
+            for loser in losers:
+                self.payoff[codes[winner], codes[loser]] = 1
+                self.payoff[codes[loser], codes[winner]] = -1
+
+    @property
+    def num_moves(self):
+        return len(self.moves)
+
+RULES = {
+    "rps": Rules(GESTURES, {
+        "rock": ["scissors"],
+        "paper": ["rock"],
+        "scissors": ["paper"],
+    }),
+    "rpsls": Rules(GESTURES + ("lizard", "spock"), {
+        "rock": ["scissors", "lizard"],
+        "paper": ["rock", "spock"],
+        "scissors": ["paper", "lizard"],
+        "lizard": ["paper", "spock"],
+        "spock": ["rock", "scissors"],
+    }),
+}
+
+class FixedPlayer:
+    # Moves that don't depend on the game so far, drawn for a whole batch
+    # up front by sample(rng, (matches, rounds), num_moves)
+    def __init__(self, sample):
+        self.sample = sample
+
+    def start(self, rng, matches, rounds, num_moves):
+        self.moves = self.sample(rng, (matches, rounds), num_moves).astype(np.int8)
+
+    def choose(self, round_index):
+        return self.moves[:, round_index]
+
+    def observe(self, own, other):
+        pass
+
+class AdaptivePlayer:
+    # One of the AI strategies from opponents.py, learning within each match
+    def __init__(self, name):
+        self.name = name
+
+    def start(self, rng, matches, rounds, num_moves):
+        if num_moves != NUM_MOVES:
+            raise ValueError(f"strategy '{self.name}' only supports {NUM_MOVES}-move rules")
+        self.strategy = STRATEGIES[self.name](games=matches, seed=int(rng.integers(2**32)))
+
+    def choose(self, round_index):
+        return self.strategy.choose()
+
+    def observe(self, own, other):
+        # Strategies are written from the AI's side: observe(human, ai)
+        self.strategy.observe(other, own)
+
+def _biased(rng, shape, num_moves):
+    # Half the time the first move, otherwise uniform
+    p = np.full(num_moves, 0.5 / num_moves)
+    p[0] += 0.5
+    return rng.choice(num_moves, shape, p=p)
+
+PLAYERS = {
+    "uniform": lambda: FixedPlayer(lambda rng, shape, n: rng.integers(0, n, shape)),
+    "biased": lambda: FixedPlayer(_biased),
+    "constant": lambda: FixedPlayer(lambda rng, shape, n: np.zeros(shape)),
+    "cycle": lambda: FixedPlayer(lambda rng, shape, n: np.broadcast_to(np.arange(shape[1]) % n, shape)),
+}
+PLAYERS.update({"ai:" + name: (lambda name=name: AdaptivePlayer(name)) for name in STRATEGIES})
+
+def play_batch(rules, player_a, player_b, matches, rounds, rng):
+    # Outcomes for player A as an int8 (matches, rounds) array
+    player_a.start(rng, matches, rounds, rules.num_moves)
+    player_b.start(rng, matches, rounds, rules.num_moves)
+    outcomes = np.empty((matches, rounds), dtype=np.int8)
+    for i in range(rounds):
+        a = player_a.choose(i)
+        b = player_b.choose(i)
+        player_a.observe(a, b)
+        player_b.observe(b, a)
+        outcomes[:, i] = rules.payoff[a, b]
+    return outcomes
+
+def summarize(outcomes):
+    # Counts for one batch. As in engine.Match, every round counts toward
+    # max_rounds (ties included) and the higher score takes the match.
+    matches, rounds = outcomes.shape
+    margin = np.cumsum(outcomes, axis=1, dtype=np.int16)
+    final = margin[:, -1]
+    # The match is decided once the lead exceeds the rounds still to play
+    remaining = rounds - 1 - np.arange(rounds)
+    decided = np.abs(margin) > remaining
+    decided_at = np.where(decided.any(axis=1), decided.argmax(axis=1) + 1, rounds)
+    return {
+        "a_matches": int(np.count_nonzero(final > 0)),
+        "b_matches": int(np.count_nonzero(final < 0)),
+        "a_rounds": int(np.count_nonzero(outcomes == 1)),
+        "b_rounds": int(np.count_nonzero(outcomes == -1)),
+        "decided_rounds": int(decided_at.sum()),
+    }
+
+def simulate(rules_name, a_name, b_name, matches=1000000, rounds=3, batch=200000, seed=0):
+    rules = RULES[rules_name]
+    rng = np.random.default_rng(seed)
+    totals = dict.fromkeys(("a_matches", "b_matches", "a_rounds", "b_rounds", "decided_rounds"), 0)
+
+    start = time.perf_counter()
+    for offset in range(0, matches, batch):
+        size = min(batch, matches - offset)
+        outcomes = play_batch(rules, PLAYERS[a_name](), PLAYERS[b_name](), size, rounds, rng)
+        for key, value in summarize(outcomes).items():
+            totals[key] += value
+    elapsed = time.perf_counter() - start
+
+    played = matches * rounds
+    return {
+        "a_match_win_rate": round(totals["a_matches"] / matches, 4),
+        "b_match_win_rate": round(totals["b_matches"] / matches, 4),
+        "match_draw_rate": round(1 - (totals["a_matches"] + totals["b_matches"]) / matches, 4),
+        "a_round_win_rate": round(totals["a_rounds"] / played, 4),
+        "b_round_win_rate": round(totals["b_rounds"] / played, 4),
+        "mean_deciding_round": round(totals["decided_rounds"] / matches, 3),
+        "matches": matches,
+        "rounds_per_second": round(played / elapsed) if elapsed > 0 else 0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo tournament of strategies, match lengths and rule variants")
+    parser.add_argument("--rules", choices=list(RULES), default="rps")
+    parser.add_argument("--players", nargs="+", default=["uniform", "biased", "ai:frequency", "ai:ensemble"],
+                        choices=list(PLAYERS))
+    parser.add_argument("--rounds", type=int, nargs="+", default=[3, 5],
+                        help="match lengths to compare (max_rounds)")
+    parser.add_argument("--matches", type=int, default=1000000, help="matches per pairing")
+    parser.add_argument("--batch", type=int, default=200000, help="matches resolved per batch")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = {}
+    for rounds in args.rounds:
+        for a_name, b_name in itertools.combinations(args.players, 2):
+            stats = simulate(args.rules, a_name, b_name, args.matches, rounds, args.batch, args.seed)
+            results[f"{args.rules} best-of-{rounds}: {a_name} vs {b_name}"] = stats
+            print(f"best-of-{rounds} {a_name:>14s} vs {b_name:14s} "
+                  f"{stats['a_match_win_rate']:6.1%} / {stats['b_match_win_rate']:6.1%} "
+                  f"(draw {stats['match_draw_rate']:6.1%})  {stats['rounds_per_second']:>12,} rounds/s",
+                  file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
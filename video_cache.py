@@ -0,0 +1,159 @@
+import cv2
+import numpy as np
+import json
+import os
+import threading
+
+# A per-user cache directory on disk rather than the temp dir, which is
+# often tmpfs (RAM); RPS_VIDEO_CACHE overrides it
+DEFAULT_CACHE_DIR = os.environ.get("RPS_VIDEO_CACHE") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "rps_video_cache")
+# Frames are stored at this fraction of the output size and scaled up on
+# playback, which keeps a result video near 150 MB instead of 600 MB. The
+# result videos are 720x720, so half of 1580x920 loses little detail.
+STORE_SCALE = 0.5
+
+class CachedVideo:
+    # Raw BGR frames at a reduced size in one memory-mapped file, so
+    # playback never decodes anything; it only scales the shown frame up
+    # into a reused output buffer.
+    def __init__(self, frames, fps, size):
+        self.frames = frames
+        self.fps = fps
+        self.size = size
+        self.index = None
+        self.frame = np.empty((size[1], size[0], 3), dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def frame_at(self, elapsed):
+        # Frame for a playback time in seconds, looping at the native FPS.
+        # The render loop usually runs faster than the video, so the last
+        # scaled frame is reused until the index moves on.
+        index = int(elapsed * self.fps) % len(self)
+        if index != self.index:
+            cv2.resize(self.frames[index], self.size, dst=self.frame, interpolation=cv2.INTER_LINEAR)
+            self.index = index
+        return self.frame
+
+class VideoCache:
+    # Decodes and downscales videos once into raw frame files so playback
+    # and replays do no decode work. Files are keyed by source name, size, mtime and
+    # output size, so they survive restarts; writing an entry removes the
+    # stale ones for the same video and output size.
+    def __init__(self, size, cache_dir=DEFAULT_CACHE_DIR):
+        self.size = size
+        self.cache_dir = cache_dir
+        self.videos = {}
+        self.loading = set()
+        self.lock = threading.Lock()
+
+    def preload(self, paths):
+        # Decode in the background so startup is not blocked
+        thread = threading.Thread(target=self._load_all, args=(list(paths),), daemon=True)
+        thread.start()
+        return thread
+
+    def _load_all(self, paths):
+        for path in paths:
+            self.load(path)
+
+    def get(self, path):
+        # Returns None while a background preload of this video is running,
+        # or if it could not be decoded (remembered, so it is not retried
+        # every frame)
+        with self.lock:
+            if path in self.videos:
+                return self.videos[path]
+            if path in self.loading:
+                return None
+        return self.load(path)
+
+    def load(self, path):
+        with self.lock:
+            if path in self.videos:
+                return self.videos[path]
+            self.loading.add(path)
+
+        try:
+            video = self._open_cached(path)
+            if video is None:
+                video = self._decode(path)
+        finally:
+            with self.lock:
+                self.loading.discard(path)
+
+        with self.lock:
+            self.videos[path] = video
+        return video
+
+    def _cache_prefix(self, path):
+        width, height = self.size
+        name = os.path.splitext(os.path.basename(path))[0]
+        return f"{name}_{width}x{height}_"
+
+    def _cache_paths(self, path):
+        stat = os.stat(path)
+        key = self._cache_prefix(path) + f"{stat.st_size}_{int(stat.st_mtime)}"
+        base = os.path.join(self.cache_dir, key)
+        return base + ".raw", base + ".json"
+
+    def _remove_stale(self, path):
+        # Older entries for this video and output size in the cache dir,
+        # including JPEG frame files (.jpgs) from before frames were raw
+        prefix = self._cache_prefix(path)
+        current = {os.path.basename(p) for p in self._cache_paths(path)}
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name not in current and not name.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _open_cached(self, path):
+        if not os.path.exists(path):
+            return None
+        data_path, meta_path = self._cache_paths(path)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        frames = np.memmap(data_path, dtype=np.uint8, mode="r",
+                           shape=(meta["frames"], meta["height"], meta["width"], 3))
+        return CachedVideo(frames, meta["fps"], self.size)
+
+    def _decode(self, path):
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            return None
+
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        width = max(1, int(self.size[0] * STORE_SCALE))
+        height = max(1, int(self.size[1] * STORE_SCALE))
+        data_path, meta_path = self._cache_paths(path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write to temporary files first so a crash never leaves a bad cache
+        count = 0
+        with open(data_path + ".tmp", "wb") as f:
+            while True:
+                ret, frame = capture.read()
+                if not ret:
+                    break
+                f.write(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA).tobytes())
+                count += 1
+        capture.release()
+
+        if count == 0:
+            os.remove(data_path + ".tmp")
+            return None
+
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({"frames": count, "fps": fps, "width": width, "height": height}, f)
+        os.replace(data_path + ".tmp", data_path)
+        os.replace(meta_path + ".tmp", meta_path)
+        self._remove_stale(path)
+        return self._open_cached(path)